@@ -0,0 +1,259 @@
+from collections import deque
+from src.config import config
+from src.logger import logger
+import time
+
+# Binance aligns every minute/hour/day interval on the UTC epoch; weekly candles open on Monday 00:00 UTC
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+    "1w": 7 * 24 * 60 * 60_000,
+}
+INTERVAL_OFFSET_MS = {"1w": 4 * 24 * 60 * 60_000}  # 1970-01-01 was a Thursday
+
+MAX_KLINES_PER_REQUEST = 1500
+
+
+def interval_ms(interval: str) -> int:
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+
+def bucket_start(timestamp: int, interval: str) -> int:
+    """
+    Open time of the `interval` candle that contains `timestamp`, aligned the same way as the exchange.
+    """
+    offset = INTERVAL_OFFSET_MS.get(interval, 0)
+    return timestamp - (timestamp - offset) % interval_ms(interval)
+
+
+def aggregate(candles: list, timestamp: int) -> dict:
+    """
+    Merge consecutive base candles into a single candle opening at `timestamp`.
+    """
+    return {
+        "timestamp": timestamp,
+        "open": candles[0]["open"],
+        "high": max(c["high"] for c in candles),
+        "low": min(c["low"] for c in candles),
+        "close": candles[-1]["close"],
+        "volume": sum(c["volume"] for c in candles),
+    }
+
+
+class CandleBuilder:
+    """
+    Keeps a single base-interval candle series per symbol and derives every higher timeframe from it.
+
+    Closed higher-timeframe candles are frozen once built; only the forming candle of each timeframe is
+    re-aggregated when a new base candle arrives, so consulting more timeframes costs no extra requests.
+    """
+
+    def __init__(self, fetch, base_interval: str = config.BASE_TIMEFRAME, clock=None):
+        """
+        Args:
+            fetch: Candle source with the signature of `Trader.get_candles`.
+            base_interval: The only interval requested from `fetch`.
+            clock: Returns the exchange's current time in ms; local time when None.
+        """
+        self.fetch = fetch
+        self.clock = clock or (lambda: int(time.time() * 1000))
+        self.base_interval = base_interval
+        self.base_ms = interval_ms(base_interval)
+        self.max_base_candles = 0
+        self._limits = {}        # timeframe -> largest limit requested
+        self._base = {}          # symbol -> deque of base candles
+        self._derived = {}       # (symbol, timeframe) -> deque of aggregated candles
+
+    def __len__(self):
+        return len(self._base)
+
+    def shed(self, keep=()) -> str:
+        """
+        Free memory: drop the series of symbols not in `keep` and every derived timeframe, which is rebuilt
+        from the base candles when next requested.
+        """
+        keep = set(keep)
+        dropped = [symbol for symbol in self._base if symbol not in keep]
+        for symbol in dropped:
+            del self._base[symbol]
+        derived = len(self._derived)
+        self._drop_derived()
+        return f"{len(dropped)} symbols, {derived} derived series"
+
+    def track(self, interval: str, limit: int):
+        """
+        Register a timeframe that will be consulted with up to `limit` candles.
+        """
+        if limit <= self._limits.get(interval, 0):
+            return
+        ratio = self._ratio(interval)
+        self._limits[interval] = limit
+        needed = self._limits[interval] * ratio + ratio  # one extra bucket to absorb a partial first candle
+        if needed > MAX_KLINES_PER_REQUEST:
+            raise ValueError(f"{interval} x {limit} needs {needed} {self.base_interval} candles, "
+                             f"more than one request can return ({MAX_KLINES_PER_REQUEST})")
+        self._drop_derived()
+        if needed > self.max_base_candles:
+            self.max_base_candles = needed
+            for symbol, series in self._base.items():
+                self._base[symbol] = deque(series, maxlen=needed)
+
+    def _ratio(self, interval: str) -> int:
+        ms = interval_ms(interval)
+        if ms % self.base_ms:
+            raise ValueError(f"{interval} is not a multiple of the base interval {self.base_interval}")
+        return ms // self.base_ms
+
+    def missing_candles(self, symbol: str, now_ms: int = None) -> int:
+        """
+        Number of base candles to request so the series is complete up to the forming candle.
+        """
+        series = self._base.get(symbol)
+        if not series:
+            return self.max_base_candles
+        now_ms = now_ms if now_ms is not None else self.clock()
+        # +1 re-fetches the last stored candle, which was still forming when we got it
+        gap = (now_ms - series[-1]["timestamp"]) // self.base_ms + 1
+        return max(2, min(gap, self.max_base_candles))
+
+    def fetch_new(self, symbol: str) -> list:
+        """
+        Request the base candles that are new since the last refresh, without folding them in. Only reads
+        the series, so several symbols can be fetched from different threads before calling `update`.
+
+        Once the series exists the request is anchored with startTime on the last stored candle, so the
+        response starts exactly where the series ends whatever the local clock says, and only those few
+        candles are parsed.
+        """
+        series = self._base.get(symbol)
+        limit = self.missing_candles(symbol)
+        if series and limit < self.max_base_candles:
+            return self.fetch(symbol, self.base_interval, limit=limit, start_time=series[-1]["timestamp"])
+        return self.fetch(symbol, self.base_interval, limit=limit)
+
+    def refresh(self, symbol: str) -> bool:
+        """
+        Fetch only the base candles that are new since the last refresh and fold them in.
+        """
+        candles = self.fetch_new(symbol)
+        if not candles:
+            return False
+        self.update(symbol, candles)
+        return True
+
+    def update(self, symbol: str, candles: list):
+        """
+        Merge base candles (oldest first) into the symbol's series. A candle with the same timestamp as the
+        last stored one replaces it, since that candle was still forming when it was stored.
+        """
+        series = self._base.get(symbol)
+        if series is None:
+            series = self._base[symbol] = deque(maxlen=self.max_base_candles or None)
+
+        changed_from = None
+        for candle in candles:
+            if series and candle["timestamp"] < series[-1]["timestamp"]:
+                continue
+            if series and candle["timestamp"] == series[-1]["timestamp"]:
+                series[-1] = candle
+            else:
+                if series and candle["timestamp"] > series[-1]["timestamp"] + self.base_ms:
+                    logger.warning(f"Gap in {self.base_interval} candles for {symbol}; restarting its series")
+                    series.clear()
+                    self._drop_derived(symbol)
+                    changed_from = None
+                series.append(candle)
+            if changed_from is None:
+                changed_from = candle["timestamp"]
+
+        if changed_from is not None:
+            for key in [k for k in self._derived if k[0] == symbol]:
+                self._fold(symbol, key[1], changed_from)
+
+    def _drop_derived(self, symbol: str = None):
+        for key in [k for k in self._derived if symbol is None or k[0] == symbol]:
+            del self._derived[key]
+
+    def _fold(self, symbol: str, interval: str, changed_from: int):
+        """
+        Re-aggregate the buckets touched by base candles at or after `changed_from`.
+        """
+        derived = self._derived[(symbol, interval)]
+        start = bucket_start(changed_from, interval)
+        while derived and derived[-1]["timestamp"] >= start:
+            derived.pop()
+
+        members = []
+        for candle in reversed(self._base[symbol]):
+            if candle["timestamp"] < start:
+                break
+            members.append(candle)
+
+        bucket, pending = None, []
+        for candle in reversed(members):
+            ts = bucket_start(candle["timestamp"], interval)
+            if ts != bucket:
+                if pending:
+                    derived.append(aggregate(pending, bucket))
+                bucket, pending = ts, []
+            pending.append(candle)
+        if pending:
+            derived.append(aggregate(pending, bucket))
+
+    def _build(self, symbol: str, interval: str) -> deque:
+        derived = deque(maxlen=self._limits[interval])
+        series = self._base.get(symbol, ())
+        bucket, pending = None, []
+        for candle in series:
+            ts = bucket_start(candle["timestamp"], interval)
+            if ts != bucket:
+                # The oldest bucket may start before our history does, so only keep complete ones
+                if pending and pending[0]["timestamp"] == bucket:
+                    derived.append(aggregate(pending, bucket))
+                bucket, pending = ts, []
+            pending.append(candle)
+        if pending and pending[0]["timestamp"] == bucket:
+            derived.append(aggregate(pending, bucket))
+        self._derived[(symbol, interval)] = derived
+        return derived
+
+    def export(self) -> dict:
+        """
+        Base candle buffers per symbol, for persisting across restarts.
+        """
+        return {symbol: list(series) for symbol, series in self._base.items()}
+
+    def restore(self, buffers: dict):
+        """
+        Load buffers produced by `export`. The next `refresh` of each symbol then only backfills the gap.
+        """
+        for symbol, candles in buffers.items():
+            self._base[symbol] = deque(candles, maxlen=self.max_base_candles or None)
+        self._drop_derived()
+
+    def get_candles(self, symbol: str, interval: str, limit: int = 100) -> list:
+        """
+        Candles for `interval` in the same format as `Trader.get_candles`, forming candle last.
+        """
+        if limit > self._limits.get(interval, 0):
+            self.track(interval, limit)
+        if interval == self.base_interval:
+            series = self._base.get(symbol, ())
+        else:
+            series = self._derived.get((symbol, interval))
+            if series is None:
+                series = self._build(symbol, interval)
+        return list(series)[-limit:]
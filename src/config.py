@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 from pathlib import Path
+import json
 import os
 
 # Get the path to the current file
@@ -29,12 +30,102 @@ class Config:
     LOWER_TIMEFRAME = "5m"
     CANDLE_LIMIT = 44
     LOWER_CANDLE_LIMIT = 60
+    BASE_TIMEFRAME = "5m"  # Only interval fetched from the exchange; TIMEFRAME and LOWER_TIMEFRAME are derived from it
     STRATEGY_NAME = "liquidity_sweep_strategy"
+    ENTRY_BATCH_SIZE = 3  # Collected signals that go out at once instead of waiting for ENTRY_BATCH_WINDOW
+    ENTRY_BATCH_WINDOW = 2.0  # Seconds a signal may wait for others to share its batch order request
+    # Extra accounts every signal is also traded on. API keys are read from the named environment variables:
+    # [{"name": "sub1", "key_env": "SUB1_API_KEY", "secret_env": "SUB1_API_SECRET", "trade_quantity_usdt": 50, "leverage": 2}]
+    ACCOUNTS = json.loads(os.getenv("ACCOUNTS", "[]"))
+    SCREEN_BATCH = 25  # Symbols fetched before each vectorised sweep screen
+    SCAN_SWEEP_BONUS = 1.0  # Scan priority added for symbols whose last evaluation found a sweep
+    DATA_WORKERS = 8  # Concurrent requests for strategy timeframes that can't be derived from BASE_TIMEFRAME
+
+    # Startup
+    EXCHANGE_INFO_MAX_AGE = 6 * 60 * 60  # Seconds before cached exchange metadata is re-fetched
+    ACCOUNT_STATE_MAX_AGE = 60 * 60  # Seconds before cached leverage and margin type are re-read
+    SNAPSHOT_INTERVAL = 5 * 60  # Seconds between warm-start snapshots
+    SNAPSHOT_MAX_AGE = 24 * 60 * 60  # Older snapshots are ignored on startup
+
+    # Latency probe
+    LATENCY_PROBE_INTERVAL = 15  # Seconds between server time / ping samples
+    LATENCY_WINDOW = 240  # Samples kept for the rolling percentiles
+    CLOCK_OFFSET_SMOOTHING = 0.2  # Weight of the newest sample in the smoothed clock offset
+    RECV_WINDOW_MIN = 5000  # Milliseconds; recvWindow never goes below this
+    RECV_WINDOW_RTT_MULTIPLE = 4  # recvWindow follows this multiple of the p99 round trip
+    LATENCY_P99_ALERT_MS = 1000
+    CLOCK_DRIFT_ALERT_MS = 500
+    LATENCY_ALERT_COOLDOWN = 30 * 60  # Seconds between alert emails
+
+    # Record / replay of exchange traffic
+    EXCHANGE_MODE = os.getenv("EXCHANGE_MODE", "live")  # "live", "record", "replay" or "synthetic"
+    REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "0"))  # Sleep speed-up factor; 0 skips sleeps entirely
+
+    # Synthetic market (EXCHANGE_MODE=synthetic and `python -m src.synthetic`)
+    SYNTHETIC_SYMBOLS = int(os.getenv("SYNTHETIC_SYMBOLS", "1000"))
+    SYNTHETIC_MODEL = os.getenv("SYNTHETIC_MODEL", "regime")  # "random_walk" or "regime"
+    SYNTHETIC_SETUP_RATE = float(os.getenv("SYNTHETIC_SETUP_RATE", "0.05"))  # Share of symbols ending in a planted setup
+    SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+    SYNTHETIC_URL = os.getenv("SYNTHETIC_URL", "")  # e.g. http://127.0.0.1:7500; empty runs the market in-process
+
+    # Sharded workers
+    WORKER_ID = os.getenv("WORKER_ID", "")  # Set by `python -m src.coordinator run`; empty runs a single process
+    MAX_OPEN_POSITIONS = 10  # Across all workers
+    MAX_TOTAL_NOTIONAL = 5000.0  # USDT position size across all workers
+    WORKER_HEARTBEAT_INTERVAL = 5  # Seconds
+    WORKER_TIMEOUT = 30  # Seconds without a heartbeat before a worker's symbols are reassigned
+    UNIVERSE_REFRESH = 15 * 60  # Seconds between reports of the tradable pairs to the coordinator
+
+    # State journal
+    JOURNAL_FSYNC_BATCH = 8  # Events written before an fsync is forced
+    JOURNAL_FSYNC_INTERVAL = 1.0  # Seconds a written event may wait for its fsync
+    JOURNAL_COMPACT_EVENTS = 500  # Events after which the journal is rewritten as a snapshot
+
+    # Logging
+    LOG_MODE = os.getenv("LOG_MODE", "text")  # "json": compact JSON lines written through bounded queues
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+    LOG_LEVELS = json.loads(os.getenv("LOG_LEVELS", "{}"))  # Per-module levels, e.g. {"src.trader": "INFO"}
+    LOG_QUEUE_SIZE = 10_000  # Lines waiting to be written in json mode; more are dropped and counted
+    LOG_SAMPLE_WINDOW = 60  # Seconds
+    LOG_SAMPLE_BURST = 5  # Messages per call site and symbol logged in full each window
+    LOG_SAMPLE_EVERY = 100  # Past the burst, one message in this many is logged
+    # Trade lifecycle call sites ("module" or "module:function") that are never sampled
+    LOG_UNSAMPLED = [
+        "src.main:poll_trade", "src.main:report_trade", "src.main:run_trades", "src.main:adopt_trades",
+        "src.main:prepare_entry", "src.fanout", "src.order_gateway", "src.state_journal", "src.trade_logger",
+        "src.trader:place_limit_order", "src.trader:place_batch_orders", "src.trader:set_leverage",
+        "src.trader:cancel_order", "src.trader:close_position",
+    ]
+
+    # Resource monitor
+    RESOURCE_INTERVAL = 5 * 60  # Seconds between resource snapshots
+    # Memory per subsystem via tracemalloc. Off by default: every allocation pays for recording its stack, and
+    # each snapshot walks all live traces on the scan loop. Turn on to chase a leak or to enforce subsystem budgets
+    RESOURCE_TRACEMALLOC = os.getenv("RESOURCE_TRACEMALLOC", "0") == "1"
+    RESOURCE_TRACE_DEPTH = 12  # Frames kept per allocation, to find the subsystem that keeps it
+    RESOURCE_TOP_ALLOCATIONS = 15  # Allocation sites kept in each snapshot
+    RESOURCE_FD_LIMIT = 512  # Open file descriptors before a warning
+    # MB per subsystem (strategy, candles, trader, notifier, logging, journal, other; needs RESOURCE_TRACEMALLOC)
+    # and for the whole process (rss)
+    MEMORY_BUDGETS = json.loads(os.getenv(
+        "MEMORY_BUDGETS", '{"rss": 1536, "candles": 512, "strategy": 256, "trader": 128, "logging": 64, "notifier": 64}'))
+    SHED_ON_BUDGET = os.getenv("SHED_ON_BUDGET", "0") == "1"  # Drop a subsystem's caches when it goes over budget
 
     # File Paths
     GOOGLE_SHEET_NAME = "Obamanator_Trades"
-    TRADE_LOG_FILE = BASE_DIR / 'records' / 'trades.csv'
-    TEMP_TRADE_LOG_FILE = BASE_DIR / 'records' / 'recent_trades.csv'
+    # A replay or synthetic run keeps its trades and state apart from the real ones
+    SIMULATED = EXCHANGE_MODE in ("replay", "synthetic")
+    RECORDS_DIR = BASE_DIR / 'records' / EXCHANGE_MODE if SIMULATED else BASE_DIR / 'records'
+    TRADE_LOG_FILE = RECORDS_DIR / 'trades.csv'
+    TEMP_TRADE_LOG_FILE = RECORDS_DIR / 'recent_trades.csv'
+    EXECUTIONS_FILE = RECORDS_DIR / 'executions.csv'
+    RESOURCE_LOG = RECORDS_DIR / 'resources.jsonl'
     GOOGLE_CREDENTIALS_JSON = BASE_DIR / 'records' / 'credentials.json'
+    # Each worker keeps its own warm-start snapshot and journal
+    SNAPSHOT_FILE = RECORDS_DIR / f'snapshot{"_" + WORKER_ID if WORKER_ID else ""}.json.gz'
+    JOURNAL_FILE = RECORDS_DIR / f'state_journal{"_" + WORKER_ID if WORKER_ID else ""}.jsonl'
+    HISTORY_DIR = BASE_DIR / 'records' / 'history'
+    COORDINATOR_ADDRESS = os.getenv("COORDINATOR_ADDRESS", str(BASE_DIR / 'records' / 'coordinator.sock'))  # Or host:port
+    EXCHANGE_LOG = Path(os.getenv("EXCHANGE_LOG", BASE_DIR / 'records' / 'exchange_log.jsonl.gz'))
 
 config = Config()
\ No newline at end of file
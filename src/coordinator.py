@@ -0,0 +1,461 @@
+from src.config import config
+from src.logger import logger
+from pathlib import Path
+import socketserver
+import subprocess
+import threading
+import argparse
+import hashlib
+import socket
+import json
+import time
+import sys
+import os
+
+
+def _is_tcp(address: str) -> bool:
+    return ":" in address and not address.startswith(("/", "."))
+
+
+def _split(address: str) -> tuple:
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def _weight(worker_id: str, symbol: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{worker_id}/{symbol}".encode(), digest_size=8).digest(), "big")
+
+
+def trade_notional(trade: dict) -> float:
+    return float(trade["quantity"]) * float(trade["entry_price"])
+
+
+class RiskCoordinator:
+    """
+    Shared state of a sharded deployment: which worker scans which symbols, and every position or entry in
+    flight across all of them.
+
+    Symbols are spread over the live workers by rendezvous hashing, so a worker joining or leaving only moves
+    the symbols it gains or loses. A symbol with a position stays with the worker holding it. A worker that
+    misses heartbeats for `worker_timeout` seconds is dropped: its reservations are freed and its journaled
+    trades are handed to the new owner of each symbol, which resumes monitoring them.
+    """
+
+    def __init__(self, max_positions: int = config.MAX_OPEN_POSITIONS,
+                 max_notional: float = config.MAX_TOTAL_NOTIONAL,
+                 worker_timeout: float = config.WORKER_TIMEOUT):
+        self.max_positions = max_positions
+        self.max_notional = max_notional
+        self.worker_timeout = worker_timeout
+        self.universe = []
+        self.workers = {}     # worker_id -> last heartbeat time
+        self.positions = {}   # symbol -> {"worker", "notional", "trades": {order_id: trade}}; worker None while orphaned
+        self.shards = {}      # worker_id -> sorted symbols
+        self.version = 0      # bumped whenever the shards change
+        self._lock = threading.Lock()
+
+    # Sharding
+    def _owner(self, symbol: str, workers: list) -> str:
+        return max(workers, key=lambda worker_id: _weight(worker_id, symbol))
+
+    def _rebalance(self):
+        workers = sorted(self.workers)
+        shards = {worker_id: [] for worker_id in workers}
+        if workers:
+            for symbol in self.universe:
+                held = self.positions.get(symbol)
+                owner = held["worker"] if held and held["worker"] in shards else self._owner(symbol, workers)
+                shards[owner].append(symbol)
+        if shards != self.shards:
+            self.shards = shards
+            self.version += 1
+            logger.info(f"Rebalanced {len(self.universe)} symbols over {len(workers)} worker(s) "
+                        f"(shard version {self.version})")
+
+    def _reap(self):
+        now = time.time()
+        dead = [worker_id for worker_id, seen in self.workers.items() if now - seen > self.worker_timeout]
+        for worker_id in dead:
+            del self.workers[worker_id]
+            for symbol, held in list(self.positions.items()):
+                if held["worker"] != worker_id:
+                    continue
+                if not held["trades"]:
+                    del self.positions[symbol]  # reserved but never placed
+                else:
+                    held["worker"] = None
+            logger.warning(f"Worker {worker_id} missed its heartbeats; reassigning its symbols")
+        if dead:
+            self._rebalance()
+
+    def _adoptions(self, worker_id: str) -> list:
+        """
+        Orphaned trades on symbols now owned by `worker_id`; ownership moves to it as they are handed over.
+        """
+        trades = []
+        workers = sorted(self.workers)
+        for symbol, held in self.positions.items():
+            if held["worker"] is None and self._owner(symbol, workers) == worker_id:
+                held["worker"] = worker_id
+                trades.extend(held["trades"].values())
+        if trades:
+            self._rebalance()
+        return trades
+
+    # Requests
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        with self._lock:
+            self._reap()
+            if op == "status":
+                return self._status()
+            worker_id = request.get("worker")
+            if not worker_id:
+                return {"ok": False, "error": "missing worker id"}
+            if op == "heartbeat":
+                return self._heartbeat(worker_id, request.get("universe"))
+            if worker_id not in self.workers:
+                return {"ok": False, "error": "unknown worker; heartbeat first"}
+            if op == "acquire":
+                return self._acquire(worker_id, request["symbol"], float(request["notional"]))
+            if op == "hold":
+                return self._hold(worker_id, request["trade"])
+            if op == "release":
+                return self._release(worker_id, request["symbol"], request.get("order_id"))
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def _heartbeat(self, worker_id: str, universe) -> dict:
+        joined = worker_id not in self.workers
+        self.workers[worker_id] = time.time()
+        changed = universe is not None and sorted(universe) != self.universe
+        if changed:
+            self.universe = sorted(universe)
+        if joined or changed:
+            self._rebalance()
+        adopt = self._adoptions(worker_id)
+        return {
+            "ok": True,
+            "version": self.version,
+            "shard": self.shards.get(worker_id, []),
+            "adopt": adopt,
+            "joined": joined,                  # the worker should re-declare the trades it holds
+            "need_universe": not self.universe,
+        }
+
+    def _acquire(self, worker_id: str, symbol: str, notional: float) -> dict:
+        if symbol not in self.shards.get(worker_id, []):
+            return {"ok": False, "reason": f"{symbol} is not in this worker's shard"}
+        if symbol in self.positions:
+            return {"ok": False, "reason": f"{symbol} already has a position"}
+        if len(self.positions) >= self.max_positions:
+            return {"ok": False, "reason": f"{len(self.positions)} positions open (max {self.max_positions})"}
+        total = sum(held["notional"] for held in self.positions.values())
+        if total + notional > self.max_notional:
+            return {"ok": False, "reason": f"notional {total + notional:.2f} would exceed {self.max_notional:.2f}"}
+        self.positions[symbol] = {"worker": worker_id, "notional": notional, "trades": {}}
+        return {"ok": True}
+
+    def _hold(self, worker_id: str, trade: dict) -> dict:
+        held = self.positions.get(trade["symbol"])
+        if held and held["worker"] not in (None, worker_id) and trade["order_id"] in held["trades"]:
+            # A restarted worker recovering a trade that was already handed to another worker
+            return {"ok": False, "owner": held["worker"]}
+        # Otherwise always accepted: the order is on the exchange, so it has to count against the limits.
+        # One signal traded on several accounts gives several trades on the symbol.
+        if held is None or held["worker"] != worker_id:
+            held = self.positions[trade["symbol"]] = {"worker": worker_id, "notional": 0.0, "trades": {}}
+        held["trades"][trade["order_id"]] = trade
+        held["notional"] = sum(trade_notional(t) for t in held["trades"].values())
+        self._rebalance()
+        return {"ok": True}
+
+    def _release(self, worker_id: str, symbol: str, order_id: str = None) -> dict:
+        """
+        Drop a finished trade, or the reservation when `order_id` is None; the symbol is freed once none remain.
+        """
+        held = self.positions.get(symbol)
+        if held and held["worker"] == worker_id:
+            held["trades"].pop(order_id, None)
+            if order_id is None or not held["trades"]:
+                del self.positions[symbol]
+                self._rebalance()
+        return {"ok": True}
+
+    def _status(self) -> dict:
+        return {
+            "ok": True,
+            "version": self.version,
+            "workers": {worker_id: len(self.shards.get(worker_id, [])) for worker_id in self.workers},
+            "positions": {symbol: {"worker": held["worker"], "notional": held["notional"], "trades": len(held["trades"])}
+                          for symbol, held in self.positions.items()},
+            "universe": len(self.universe),
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.coordinator.handle(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(address: str = config.COORDINATOR_ADDRESS, coordinator: RiskCoordinator = None):
+    """
+    Start the coordinator on a Unix socket path (or host:port for workers on other machines) in a
+    background thread and return the server.
+    """
+    if _is_tcp(address):
+        server = _TCPServer(_split(address), _Handler)
+    else:
+        Path(address).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(address):
+            os.unlink(address)
+        server = _UnixServer(address, _Handler)
+    server.coordinator = coordinator or RiskCoordinator()
+    threading.Thread(target=server.serve_forever, name="coordinator", daemon=True).start()
+    logger.info(f"Risk coordinator listening on {address}")
+    return server
+
+
+class CoordinatorClient(threading.Thread):
+    """
+    A worker's link to the coordinator. A background thread heartbeats every WORKER_HEARTBEAT_INTERVAL
+    seconds, reporting the tradable universe every UNIVERSE_REFRESH seconds, and keeps `shard` current.
+    Trades the coordinator hands over from a dead worker queue up until `take_adoptions` is called. Trades
+    of our own that went to another worker while we were reaped queue up for `take_handed_over`.
+
+    Entry requests fail closed: if the coordinator can't be reached, nothing new is traded.
+    """
+
+    def __init__(self, worker_id: str, trader, address: str = config.COORDINATOR_ADDRESS):
+        super().__init__(name="coordinator-client", daemon=True)
+        self.worker_id = worker_id
+        self.trader = trader
+        self.address = address
+        self.shard = []
+        self.version = -1
+        self.held = {}  # order_id -> trade this worker has declared
+        self._adopted = []
+        self._handed_over = []
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._last_universe = 0
+
+    def _connect(self):
+        if _is_tcp(self.address):
+            sock = socket.create_connection(_split(self.address), timeout=5)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(5)
+            sock.connect(self.address)
+        self._sock, self._reader = sock, sock.makefile("rb")
+
+    def request(self, op: str, **fields) -> dict:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall((json.dumps({"op": op, "worker": self.worker_id, **fields}) + "\n").encode())
+                    line = self._reader.readline()
+                    if not line:
+                        raise ConnectionError("coordinator closed the connection")
+                    return json.loads(line)
+                except (OSError, ValueError) as e:
+                    self._close()
+                    if attempt:
+                        logger.error(f"Coordinator request {op} failed: {e}")
+        return {"ok": False, "error": "coordinator unreachable"}
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._reader = None
+
+    def heartbeat(self) -> bool:
+        fields = {}
+        if time.time() - self._last_universe > config.UNIVERSE_REFRESH:
+            fields["universe"] = self.trader.get_available_pairs()
+            self._last_universe = time.time()
+        response = self.request("heartbeat", **fields)
+        if not response.get("ok"):
+            self._last_universe = 0
+            return False
+        if response["need_universe"]:
+            self._last_universe = 0  # a restarted coordinator; report it on the next beat
+        if response["joined"]:
+            for trade in list(self.held.values()):
+                if not self.hold(trade):
+                    self.held.pop(trade["order_id"], None)
+                    with self._lock:
+                        self._handed_over.append(trade)
+        if response["version"] != self.version:
+            self.shard, self.version = response["shard"], response["version"]
+            logger.info(f"Worker {self.worker_id} now scans {len(self.shard)} symbols (shard version {self.version})")
+        if response["adopt"]:
+            with self._lock:
+                self._adopted.extend(response["adopt"])
+        return True
+
+    def take_adoptions(self) -> list:
+        with self._lock:
+            trades, self._adopted = self._adopted, []
+        return trades
+
+    def take_handed_over(self) -> list:
+        """
+        Trades we were monitoring that another worker adopted while this one was considered dead.
+        """
+        with self._lock:
+            trades, self._handed_over = self._handed_over, []
+        return trades
+
+    def acquire(self, symbol: str, notional: float) -> bool:
+        response = self.request("acquire", symbol=symbol, notional=notional)
+        if not response.get("ok"):
+            logger.info(f"Coordinator declined {symbol}: {response.get('reason', response.get('error'))}")
+            return False
+        return True
+
+    def hold(self, trade: dict) -> bool:
+        """
+        Declare a placed order or open position. False if another worker has already taken the trade over.
+        """
+        response = self.request("hold", trade=trade)
+        if "owner" in response:
+            logger.warning(f"{trade['symbol']} trade {trade['order_id']} is now monitored by worker {response['owner']}")
+            return False
+        self.held[trade["order_id"]] = trade
+        return True
+
+    def release(self, symbol: str, order_id: str = None):
+        """
+        Free a finished trade, or the entry reservation on `symbol` when no order was placed.
+        """
+        self.held.pop(order_id, None)
+        self.request("release", symbol=symbol, order_id=order_id)
+
+    def run(self):
+        while not self._stop_event.wait(config.WORKER_HEARTBEAT_INTERVAL):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"Coordinator heartbeat failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class StandaloneCoordinator:
+    """
+    Stand-in used when the bot runs as a single process: every symbol is scanned and nothing is limited
+    beyond what the trade loop already does.
+    """
+
+    def __init__(self, trader):
+        self.shard = trader.get_available_pairs()
+
+    def take_adoptions(self) -> list:
+        return []
+
+    def take_handed_over(self) -> list:
+        return []
+
+    def acquire(self, symbol: str, notional: float) -> bool:
+        return True
+
+    def hold(self, trade: dict) -> bool:
+        return True
+
+    def release(self, symbol: str, order_id: str = None):
+        pass
+
+
+def connect(trader):
+    """
+    The coordinator link for this process: a heartbeating CoordinatorClient when WORKER_ID is set,
+    otherwise a StandaloneCoordinator.
+    """
+    if not config.WORKER_ID:
+        return StandaloneCoordinator(trader)
+    client = CoordinatorClient(config.WORKER_ID, trader)
+    while not client.heartbeat():
+        logger.warning(f"Waiting for the coordinator at {client.address}...")
+        time.sleep(config.WORKER_HEARTBEAT_INTERVAL)
+    client.start()
+    return client
+
+
+def launch(workers: int, address: str):
+    """
+    Run the coordinator and `workers` bot processes on this machine, restarting any worker that exits.
+    """
+    server = serve(address)
+    processes = {}
+
+    def start(worker_id):
+        env = {**os.environ, "WORKER_ID": worker_id, "COORDINATOR_ADDRESS": address}
+        processes[worker_id] = subprocess.Popen([sys.executable, "-m", "src.main"], env=env)
+        logger.info(f"Started worker {worker_id} (pid {processes[worker_id].pid})")
+
+    for n in range(workers):
+        start(f"w{n}")
+    try:
+        while True:
+            time.sleep(config.WORKER_HEARTBEAT_INTERVAL)
+            for worker_id, process in list(processes.items()):
+                if process.poll() is not None:
+                    logger.warning(f"Worker {worker_id} exited with code {process.returncode}; restarting")
+                    start(worker_id)
+    except KeyboardInterrupt:
+        logger.info("Stopping workers")
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-process deployment")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Coordinator plus local worker processes")
+    run.add_argument("--workers", type=int, default=2)
+    serve_cmd = sub.add_parser("serve", help="Coordinator only, for workers started elsewhere")
+    for cmd in (run, serve_cmd):
+        cmd.add_argument("--address", default=config.COORDINATOR_ADDRESS)
+    status = sub.add_parser("status", help="Print shards and positions of a running coordinator")
+    status.add_argument("--address", default=config.COORDINATOR_ADDRESS)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        launch(args.workers, args.address)
+    elif args.command == "serve":
+        server = serve(args.address)
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        client = CoordinatorClient("", None, args.address)
+        print(json.dumps(client.request("status"), indent=2))
+
+
+if __name__ == "__main__":
+    main()
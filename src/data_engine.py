@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.candle_builder import CandleBuilder, interval_ms
+from src.config import config
+from src.logger import logger
+
+
+class DataEngine:
+    """
+    Fetches, caches and delivers the candles a strategy declares in `data_requirements`, as one
+    timeframe -> candles bundle per symbol.
+
+    Timeframes that are multiples of BASE_TIMEFRAME come out of the shared CandleBuilder at no request cost.
+    Any other timeframe (finer than the base, or not aligned with it) gets its own delta-refreshed
+    CandleBuilder, and those requests go out concurrently for a whole batch of symbols instead of one by one
+    inside the strategy.
+    """
+
+    def __init__(self, candle_builder: CandleBuilder, requirements: list, fetch, workers: int = config.DATA_WORKERS):
+        self.candle_builder = candle_builder
+        self.requirements = requirements
+        self.primary = requirements[0].timeframe
+        self._direct = {}  # timeframe -> CandleBuilder fed straight from the exchange
+        for requirement in requirements:
+            if interval_ms(requirement.timeframe) % candle_builder.base_ms == 0:
+                candle_builder.track(requirement.timeframe, requirement.limit)
+            else:
+                builder = self._direct.get(requirement.timeframe)
+                if builder is None:
+                    builder = CandleBuilder(fetch, requirement.timeframe, clock=candle_builder.clock)
+                    self._direct[requirement.timeframe] = builder
+                builder.track(requirement.timeframe, requirement.limit)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="data") if self._direct else None
+        if self._direct:
+            logger.info(f"Fetching {', '.join(self._direct)} candles directly; "
+                        f"they can't be derived from {candle_builder.base_interval}")
+
+    def _stage(self, conditional: bool) -> list:
+        return [r for r in self.requirements if r.conditional == conditional]
+
+    def load(self, symbols: list) -> dict:
+        """
+        Refresh `symbols` and bundle their unconditional requirements.
+
+        Returns:
+            dict: symbol -> {timeframe: candles}, for the symbols whose candles could be fetched.
+        """
+        bundles = {}
+        for symbol in symbols:
+            if not self.candle_builder.refresh(symbol):
+                continue
+            candles = self.candle_builder.get_candles(symbol, self.primary, limit=self.requirements[0].limit)
+            if candles:
+                bundles[symbol] = {self.primary: candles}
+        self._fill(bundles, list(bundles), self._stage(False)[1:])
+        return bundles
+
+    def complete(self, bundles: dict, symbols: list):
+        """
+        Add the conditional requirements to the bundles of `symbols`, the ones that passed the first stage.
+        Symbols whose data can't be fetched are dropped from `bundles`.
+        """
+        self._fill(bundles, symbols, self._stage(True))
+
+    def _fill(self, bundles: dict, symbols: list, requirements: list):
+        if not symbols or not requirements:
+            return
+        self._refresh_direct(symbols, [r for r in requirements if r.timeframe in self._direct])
+        for symbol in symbols:
+            data = bundles[symbol]
+            for requirement in requirements:
+                source = self._direct.get(requirement.timeframe, self.candle_builder)
+                candles = source.get_candles(symbol, requirement.timeframe, limit=requirement.limit)
+                if not candles:
+                    data = None
+                    break
+                data[requirement.timeframe] = candles
+            if data is None:
+                del bundles[symbol]
+
+    def _refresh_direct(self, symbols: list, requirements: list):
+        """
+        Top up the directly fetched timeframes for `symbols`: the requests run on the pool, then the
+        responses are folded in on this thread so no builder is written to concurrently.
+        """
+        jobs = [(self._direct[r.timeframe], symbol) for r in requirements for symbol in symbols]
+        if not jobs:
+            return
+        for (builder, symbol), candles in zip(jobs, self._pool.map(lambda job: job[0].fetch_new(job[1]), jobs)):
+            if candles:
+                builder.update(symbol, candles)
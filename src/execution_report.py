@@ -0,0 +1,177 @@
+from src.latency_probe import percentile
+from datetime import datetime, timezone
+from src.config import config
+import argparse
+import csv
+
+# Upper bounds (USDT notional) of the order size buckets in the report
+SIZE_BUCKETS = [100, 250, 500, 1000, 2500, 5000]
+
+METRICS = {
+    "ack_ms": "signal -> order ack",
+    "fill_delay_s": "ack -> entry fill",
+    "fill_poll_s": "entry fill -> fill seen",
+    "exit_latency_ms": "exit trigger -> exit fill",
+    "entry_slippage_bps": "entry slippage (bps)",
+    "exit_polling_bps": "exit polling cost (bps)",
+    "exit_slippage_bps": "exit slippage (bps)",
+    "fees_bps": "fees (bps)",
+}
+
+
+def cost_bps(reference: float, price: float, buying: bool) -> float:
+    """
+    What trading at `price` instead of `reference` cost, in basis points of `reference`; negative is an
+    improvement. `buying` is the direction of that fill, not of the position.
+    """
+    if not reference:
+        return 0.0
+    return (price - reference) / reference * 1e4 if buying else (reference - price) / reference * 1e4
+
+
+def fill_price(order, default: float) -> float:
+    price = float(order.get("avgPrice") or 0) if order else 0.0
+    return price or default
+
+
+def fill_time(order, default: float) -> float:
+    return order["updateTime"] / 1000 if order and order.get("updateTime") else default
+
+
+def commission(fills: list) -> float:
+    # Commissions charged in another asset (e.g. BNB) are left out rather than converted
+    return sum(float(f["commission"]) for f in fills if f.get("commissionAsset") == "USDT")
+
+
+def execution_record(trade: dict, exit_order, exit_trigger_price: float, exit_trigger_time: float,
+                     fees: float) -> dict:
+    """
+    Timings, fill prices and costs of one finished trade, as stored in EXECUTIONS_FILE.
+
+    The exit is split in two: the polling cost is how far the ticker had moved past the level (target or
+    stop) by the time the exit was noticed, and the slippage is the market order's fill against that ticker.
+    """
+    long = trade["side"] == "LONG"
+    entry_price = trade["entry_price"]
+    entry_fill = trade.get("entry_fill_price") or entry_price
+    hit_target = exit_trigger_price >= trade["target"] if long else exit_trigger_price <= trade["target"]
+    exit_level = trade["target"] if hit_target else trade["stop_loss"]
+    exit_fill = fill_price(exit_order, exit_trigger_price)
+    notional = trade["quantity"] * entry_fill
+    return {
+        "order_id": trade["order_id"],
+        "symbol": trade["symbol"],
+        "side": trade["side"],
+        "quantity": trade["quantity"],
+        "notional": round(notional, 8),
+        "signal_time": trade.get("signal_time"),
+        "ack_time": trade.get("ack_time"),
+        "fill_time": trade.get("fill_time"),
+        "entry_time": trade.get("entry_time"),
+        "exit_trigger_time": exit_trigger_time,
+        "exit_fill_time": fill_time(exit_order, exit_trigger_time),
+        "entry_price": entry_price,
+        "entry_fill_price": entry_fill,
+        "exit_level": exit_level,
+        "exit_trigger_price": exit_trigger_price,
+        "exit_fill_price": exit_fill,
+        "fees": round(fees, 8),
+        "entry_slippage_bps": round(cost_bps(entry_price, entry_fill, buying=long), 3),
+        "exit_polling_bps": round(cost_bps(exit_level, exit_trigger_price, buying=not long), 3),
+        "exit_slippage_bps": round(cost_bps(exit_trigger_price, exit_fill, buying=not long), 3),
+        "fees_bps": round(fees / notional * 1e4, 3) if notional else 0.0,
+    }
+
+
+# Report
+def load_executions(path=None) -> list:
+    with open(path or config.EXECUTIONS_FILE, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def derive(row: dict) -> dict:
+    """
+    Per-trade metrics (None where a timestamp is missing, e.g. trades placed before instrumentation).
+    """
+    t = {k: _number(row.get(k)) for k in ("signal_time", "ack_time", "fill_time", "entry_time",
+                                          "exit_trigger_time", "exit_fill_time")}
+
+    def span(start, end, scale):
+        return (t[end] - t[start]) * scale if t[start] is not None and t[end] is not None else None
+
+    metrics = {
+        "ack_ms": span("signal_time", "ack_time", 1000),
+        "fill_delay_s": span("ack_time", "fill_time", 1),
+        "fill_poll_s": span("fill_time", "entry_time", 1),
+        "exit_latency_ms": span("exit_trigger_time", "exit_fill_time", 1000),
+    }
+    for key in ("entry_slippage_bps", "exit_polling_bps", "exit_slippage_bps", "fees_bps"):
+        metrics[key] = _number(row.get(key))
+    return metrics
+
+
+def size_bucket(notional: float) -> str:
+    lower = 0
+    for upper in SIZE_BUCKETS:
+        if notional < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f">={lower}"
+
+
+def group_key(row: dict, by: str) -> str:
+    if by == "symbol":
+        return row["symbol"]
+    if by == "hour":
+        stamp = _number(row.get("signal_time")) or _number(row.get("exit_trigger_time")) or 0
+        return f"{datetime.fromtimestamp(stamp, tz=timezone.utc).hour:02d}h UTC"
+    if by == "size":
+        return size_bucket(_number(row.get("notional")) or 0)
+    return "all"
+
+
+def aggregate(rows: list, by: str) -> dict:
+    """
+    group -> metric -> (p50, p90, p99, count) over the trades in that group.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(group_key(row, by), []).append(derive(row))
+    report = {}
+    for group, metrics in sorted(groups.items()):
+        report[group] = {}
+        for metric in METRICS:
+            values = [m[metric] for m in metrics if m[metric] is not None]
+            report[group][metric] = (percentile(values, 50), percentile(values, 90), percentile(values, 99), len(values))
+    return report
+
+
+def print_report(rows: list, by: str):
+    print(f"\nBy {by} ({len(rows)} trades)")
+    for group, metrics in aggregate(rows, by).items():
+        print(f"  {group}")
+        for metric, (p50, p90, p99, count) in metrics.items():
+            if count:
+                print(f"    {METRICS[metric]:<28}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}   n={count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execution latency and slippage percentiles (p50 p90 p99)")
+    parser.add_argument("--file", default=None, help=f"Defaults to {config.EXECUTIONS_FILE}")
+    parser.add_argument("--by", nargs="+", default=["all", "symbol", "hour", "size"],
+                        choices=["all", "symbol", "hour", "size"])
+    args = parser.parse_args()
+    rows = load_executions(args.file)
+    for by in args.by:
+        print_report(rows, by)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.state_journal import StateJournal
+from src.order_gateway import OrderGateway
+from src.trader import Trader
+from src.config import config
+from src.logger import logger
+from pathlib import Path
+import os
+
+
+def account_file(path: Path, name: str) -> Path:
+    """
+    Per-account variant of a records file; the main account (no name) keeps the plain file.
+    """
+    path = Path(path)
+    if not name:
+        return path
+    suffixes = "".join(path.suffixes)
+    return path.with_name(f"{path.name[:-len(suffixes)] if suffixes else path.name}_{name}{suffixes}")
+
+
+class Account:
+    """
+    One exchange account the scanner's signals are traded on, with its own client, precision cache,
+    leverage cache and journal of open trades.
+    """
+
+    def __init__(self, trader: Trader):
+        self.name = trader.name
+        self.trader = trader
+        self.gateway = OrderGateway(trader)
+        self.journal = StateJournal(account_file(config.JOURNAL_FILE, trader.name))
+
+    def __repr__(self):
+        return f"Account({self.name or 'main'})"
+
+
+def load_accounts(trader: Trader) -> list:
+    """
+    The main account plus every account in config.ACCOUNTS. Exchange metadata is fetched once and shared.
+    """
+    accounts = [Account(trader)]
+    for spec in config.ACCOUNTS:
+        other = Trader(
+            api_key=os.getenv(spec["key_env"]),
+            api_secret=os.getenv(spec["secret_env"]),
+            name=spec["name"],
+            trade_quantity_usdt=float(spec.get("trade_quantity_usdt", config.TRADE_QUANTITY_USDT)),
+            leverage=int(spec.get("leverage", config.LEVERAGE)),
+        )
+        other.load_exchange_info(trader.get_exchange_info(), trader._exchange_info_time)
+        accounts.append(Account(other))
+    if len(accounts) > 1:
+        logger.info(f"Trading signals on {len(accounts)} accounts: {', '.join(a.name or 'main' for a in accounts)}")
+    return accounts
+
+
+class FanOut:
+    """
+    Sends each group of entry signals to every account at once.
+
+    The scan, candles and signal are computed once; each account then sizes the entries with its own
+    TRADE_QUANTITY_USDT / leverage and submits them on its own thread, so the slowest account, not the sum
+    of all of them, bounds signal-to-order latency.
+    """
+
+    def __init__(self, accounts: list):
+        self.accounts = accounts
+        self.by_name = {account.name: account for account in accounts}
+        self._pool = ThreadPoolExecutor(max_workers=len(accounts), thread_name_prefix="fanout")
+
+    def notional(self) -> float:
+        """
+        Position size one signal opens across all accounts, for the coordinator's limits.
+        """
+        return sum(a.trader.trade_quantity_usdt * a.trader.leverage for a in self.accounts)
+
+    def submit(self, entries: list) -> list:
+        """
+        Place `entries` on every account.
+
+        Returns:
+            list: (account, trade) for every order placed, journaled in that account's journal.
+        """
+        if len(self.accounts) == 1:
+            return self._submit(self.accounts[0], entries)
+        placed = []
+        for result in self._pool.map(lambda account: self._submit(account, entries), self.accounts):
+            placed.extend(result)
+        if placed:
+            latest_ack = max(trade["ack_time"] for _, trade in placed)
+            logger.info(f"Fan-out placed {len(placed)} orders on {len(self.accounts)} accounts, "
+                        f"{(latest_ack - min(e['signal_time'] for e in entries)) * 1000:.0f} ms after the signal")
+        return placed
+
+    def _submit(self, account: Account, entries: list) -> list:
+        sized = []
+        for entry in entries:
+            quantity = account.trader.calculate_order_quantity(entry["symbol"], entry["price"])
+            if quantity <= 0:
+                logger.warning(f"Trade amount too small for {entry['symbol']} on {account}; skipping..")
+                continue
+            sized.append({**entry, "quantity": quantity})
+        if not sized:
+            return []
+
+        orders = account.gateway.submit_entries(sized, account.trader.leverage)
+        ack_time = account.trader.clock.time()
+        placed = []
+        for entry, order in zip(sized, orders):
+            if not order:
+                continue
+            order_id = str(order["orderId"])
+            account.journal.record(
+                "order_placed", order_id,
+                symbol=entry["symbol"], side=entry["strategy_side"], quantity=entry["quantity"],
+                entry_price=entry["price"], stop_loss=entry["stop_loss"], target=entry["target"],
+                signal_time=entry["signal_time"], ack_time=ack_time, account=account.name
+            )
+            placed.append((account, account.journal.trades[order_id]))
+        # One fsync for the whole group; nothing is monitored before the placements are durable
+        account.journal.sync()
+        return placed
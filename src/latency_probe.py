@@ -0,0 +1,113 @@
+from src.notifier import send_email
+from collections import deque
+from src.config import config
+from src.logger import logger
+import threading
+import math
+import time
+
+BINANCE_MAX_RECV_WINDOW = 60000
+
+
+def percentile(values, q: float) -> float:
+    """
+    Nearest-rank percentile of `values` (0 < q <= 100).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class LatencyProbe(threading.Thread):
+    """
+    Background sampler of exchange round-trip time and local clock drift.
+
+    Each sample times a ping and a server time request. The server time, taken against the midpoint of its
+    request, gives the clock offset, which is smoothed and applied to every signed request. recvWindow
+    follows the rolling p99 round trip, and an alert goes out when p99 or the drift crosses its threshold.
+    """
+
+    def __init__(self, trader, interval: float = config.LATENCY_PROBE_INTERVAL):
+        super().__init__(name="latency-probe", daemon=True)
+        self.trader = trader
+        self.followers = []  # other accounts' traders that take the same clock correction
+        self.interval = interval
+        self.ping_rtts = deque(maxlen=config.LATENCY_WINDOW)   # ms
+        self.time_rtts = deque(maxlen=config.LATENCY_WINDOW)   # ms
+        self.offset = None          # smoothed server minus local time, ms
+        self.recv_window = config.RECV_WINDOW_MIN
+        self._last_alert = 0
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        started = time.perf_counter()
+        if self.trader.ping():
+            self.ping_rtts.append((time.perf_counter() - started) * 1000)
+
+        local_start = time.time() * 1000
+        started = time.perf_counter()
+        server_time = self.trader.get_server_time()
+        rtt = (time.perf_counter() - started) * 1000
+        if server_time is None:
+            return
+        self.time_rtts.append(rtt)
+
+        # Assume the server stamped the response half way through the round trip
+        raw_offset = server_time - (local_start + rtt / 2)
+        alpha = config.CLOCK_OFFSET_SMOOTHING
+        self.offset = raw_offset if self.offset is None else alpha * raw_offset + (1 - alpha) * self.offset
+
+        p99 = percentile(self.time_rtts, 99)
+        self.recv_window = int(min(BINANCE_MAX_RECV_WINDOW,
+                                   max(config.RECV_WINDOW_MIN, config.RECV_WINDOW_RTT_MULTIPLE * p99)))
+        for trader in [self.trader, *self.followers]:
+            trader.apply_clock(int(round(self.offset)), self.recv_window)
+        self._check_alerts(p99)
+
+    def stats(self) -> dict:
+        """
+        Current rolling percentiles (ms), smoothed clock offset (ms) and recvWindow, for logging alongside trades.
+        """
+        rtts = self.ping_rtts or self.time_rtts
+        return {
+            "rtt_p50": percentile(rtts, 50),
+            "rtt_p90": percentile(rtts, 90),
+            "rtt_p99": percentile(rtts, 99),
+            "clock_offset": self.offset or 0.0,
+            "recv_window": self.recv_window,
+        }
+
+    def _check_alerts(self, p99: float):
+        problems = []
+        if p99 > config.LATENCY_P99_ALERT_MS:
+            problems.append(f"p99 round trip {p99:.0f} ms exceeds {config.LATENCY_P99_ALERT_MS} ms")
+        if abs(self.offset) > config.CLOCK_DRIFT_ALERT_MS:
+            problems.append(f"clock offset {self.offset:+.0f} ms exceeds {config.CLOCK_DRIFT_ALERT_MS} ms")
+        if not problems:
+            return
+        message = "; ".join(problems)
+        if time.time() - self._last_alert < config.LATENCY_ALERT_COOLDOWN:
+            logger.debug(f"Exchange latency still degraded: {message}")
+            return
+        self._last_alert = time.time()
+        logger.warning(f"Exchange latency alert: {message}")
+        send_email(f"Exchange latency alert\n\n{message}\n\nStats: {self.stats()}", subject="Latency alert ⚠️")
+
+    def run(self):
+        samples = 0
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Latency probe failed: {e}")
+                continue
+            samples += 1
+            if samples % 20 == 0:
+                stats = self.stats()
+                logger.debug(f"Exchange RTT p50/p90/p99: {stats['rtt_p50']:.0f}/{stats['rtt_p90']:.0f}/"
+                             f"{stats['rtt_p99']:.0f} ms, clock offset {stats['clock_offset']:+.0f} ms, "
+                             f"recvWindow {stats['recv_window']} ms")
+
+    def stop(self):
+        self._stop_event.set()
@@ -1,5 +1,15 @@
+from datetime import datetime, timedelta
+from src.config import config
 from loguru import logger
+from pathlib import Path
+import traceback
+import threading
+import atexit
+import queue
+import json
+import time
 import sys
+import re
 
 # Remove the default Loguru handler
 logger.remove()
@@ -11,22 +21,251 @@ LOG_FORMAT = (
     "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
     "<level>{message}</level>"
 )
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+LOG_DIR = Path("logs")
+RETENTION_DAYS = 7
 
-# Console handler: colored, human-readable
-logger.add(
-    sys.stdout,
-    level="DEBUG",
-    format=LOG_FORMAT,
-    colorize=True,
-    enqueue=True,
-)
+SYMBOL_PATTERN = re.compile(r"\b[A-Z0-9]{2,}USDT\b")
+CRITICAL = logger.level("CRITICAL").no  # never sampled
 
-# File handler: daily rotation, keep one week of logs
-logger.add(
-    "logs/bot_{time:YYYY-MM-DD}.log",
-    rotation="00:00",            # rotate at midnight
-    retention="7 days",         # keep logs for 7 days
-    level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    enqueue=True,
-)
+
+class Sampler:
+    """
+    Per-module levels plus rate limiting of repetitive messages, run once per message before any handler.
+
+    Messages are keyed by call site (which fixes the message template) and symbol, taken from a bound
+    `symbol` or the first pair name in the text. Each key logs its first `burst` messages per `window`
+    seconds in full, then one in `every`; the next message that gets through reports how many were left out.
+    So an outage that fails every symbol's request still logs the first errors of each symbol, and log I/O
+    stays bounded however long it lasts.
+
+    Sampling only runs when `sample` is set (json mode). Call sites in `unsampled`, given as "module" or
+    "module:function", are never sampled, so every order, fill and close is logged.
+    """
+
+    def __init__(self, level: str, module_levels: dict, window: float, burst: int, every: int,
+                 sample: bool = True, unsampled=()):
+        self.level = logger.level(level).no
+        self.module_levels = {name: logger.level(lvl).no for name, lvl in module_levels.items()}
+        self.window = window
+        self.burst = burst
+        self.every = every
+        self.sample = sample
+        self.unsampled = set(unsampled)
+        self._exempt = {}  # (module, function) -> never sampled
+        self._levels = {}  # module -> resolved level
+        self._keys = {}    # key -> [window start, messages this window, suppressed since last logged]
+        self._lock = threading.Lock()
+
+    def _module_level(self, name: str) -> int:
+        level = self._levels.get(name)
+        if level is None:
+            level = self.level
+            parts = (name or "").split(".")
+            # Most specific configured prefix wins: "src.trader" over "src"
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.module_levels:
+                    level = self.module_levels[prefix]
+                    break
+            self._levels[name] = level
+        return level
+
+    def _is_exempt(self, name: str, function: str) -> bool:
+        exempt = self._exempt.get((name, function))
+        if exempt is None:
+            exempt = self._exempt[(name, function)] = name in self.unsampled or f"{name}:{function}" in self.unsampled
+        return exempt
+
+    def __call__(self, record):
+        if record["level"].no < self._module_level(record["name"]):
+            record["extra"]["_drop"] = True
+            return
+        if record["level"].no >= CRITICAL or not self.sample or self._is_exempt(record["name"], record["function"]):
+            return
+        symbol = record["extra"].get("symbol")
+        if symbol is None:
+            match = SYMBOL_PATTERN.search(record["message"])
+            symbol = match.group(0) if match else ""
+        key = (record["name"], record["function"], record["line"], symbol)
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is None and len(self._keys) > 10_000:
+                    self._expire(now)
+                suppressed = state[2] if state else 0
+                state = self._keys[key] = [now, 0, suppressed]
+            state[1] += 1
+            if state[1] > self.burst and (state[1] - self.burst) % self.every:
+                state[2] += 1
+                record["extra"]["_drop"] = True
+                return
+            suppressed, state[2] = state[2], 0
+
+        if suppressed:
+            record["extra"]["suppressed"] = suppressed
+            record["message"] += f" [{suppressed} similar suppressed]"
+
+    def _expire(self, now: float):
+        for key in [k for k, s in self._keys.items() if now - s[0] >= self.window and not s[2]]:
+            del self._keys[key]
+
+
+_sinks = []  # AsyncSinks in use
+
+
+def queue_stats() -> dict:
+    """
+    Lines waiting in the json mode queues and lines dropped so far (both 0 in text mode).
+    """
+    return {"queued": sum(s._queue.qsize() for s in _sinks), "dropped": sum(s.dropped for s in _sinks)}
+
+
+def _keep(record) -> bool:
+    return not record["extra"].get("_drop")
+
+
+class AsyncSink:
+    """
+    Loguru sink that hands messages to a writer thread through a bounded queue.
+
+    The logging call never waits on I/O: when the queue is full the message is dropped and counted, and the
+    writer reports the count once it catches up.
+    """
+
+    def __init__(self, target, maxsize: int):
+        self.target = target
+        self.dropped = 0
+        self._reported = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        _sinks.append(self)
+
+    def write(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            try:
+                self.target.write(message)
+                if self._queue.empty():
+                    if self.dropped != self._reported:
+                        self.target.dropped(self.dropped - self._reported)
+                        self._reported = self.dropped
+                    self.target.flush()
+            except Exception as e:
+                sys.stderr.write(f"Log writer failed: {e}\n")
+
+    def close(self):
+        try:
+            self._queue.put(None, timeout=1)
+        except queue.Full:
+            return
+        self._thread.join(timeout=5)
+        self.target.flush()
+
+
+class ConsoleTarget:
+    def write(self, message):
+        sys.stdout.write(message)
+
+    def dropped(self, count: int):
+        sys.stdout.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} | WARNING  | {count} log lines dropped, queue full\n")
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class JsonFileTarget:
+    """
+    Compact JSON lines in a daily file under `directory`, keeping RETENTION_DAYS days of files.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._date = None
+        self._file = None
+
+    def _open(self, date: str):
+        if self._file:
+            self._file.close()
+        self._date = date
+        self._file = open(self.directory / f"bot_{date}.jsonl", "a")
+        cutoff = f"bot_{datetime.now() - timedelta(days=RETENTION_DAYS):%Y-%m-%d}.jsonl"
+        for old in self.directory.glob("bot_*.jsonl"):
+            if old.name < cutoff:
+                old.unlink(missing_ok=True)
+
+    def _line(self, entry: dict):
+        date = datetime.now().strftime("%Y-%m-%d")
+        if date != self._date:
+            self._open(date)
+        self._file.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+
+    def write(self, message):
+        record = message.record
+        entry = {
+            "ts": round(record["time"].timestamp(), 3),
+            "level": record["level"].name,
+            "module": record["name"],
+            "fn": record["function"],
+            "line": record["line"],
+            "msg": record["message"],
+        }
+        entry.update((k, v) for k, v in record["extra"].items() if not k.startswith("_"))
+        if record["exception"]:
+            entry["exc"] = "".join(traceback.format_exception(*record["exception"]))
+        self._line(entry)
+
+    def dropped(self, count: int):
+        self._line({"ts": round(time.time(), 3), "level": "WARNING", "module": __name__, "msg": "log lines dropped",
+                    "dropped": count})
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+
+logger.configure(patcher=Sampler(config.LOG_LEVEL, config.LOG_LEVELS, config.LOG_SAMPLE_WINDOW,
+                                 config.LOG_SAMPLE_BURST, config.LOG_SAMPLE_EVERY,
+                                 sample=config.LOG_MODE == "json", unsampled=config.LOG_UNSAMPLED))
+
+if config.LOG_MODE == "json":
+    # Structured mode: both handlers write through bounded queues, so log I/O can never stall the loops
+    console = AsyncSink(ConsoleTarget(), config.LOG_QUEUE_SIZE)
+    json_file = AsyncSink(JsonFileTarget(LOG_DIR), config.LOG_QUEUE_SIZE)
+    logger.add(console.write, level="DEBUG", format=LOG_FORMAT, colorize=True, filter=_keep)
+    logger.add(json_file.write, level="DEBUG", format="{message}", filter=_keep)
+    atexit.register(json_file.close)
+    atexit.register(console.close)
+else:
+    # Console handler: colored, human-readable
+    logger.add(
+        sys.stdout,
+        level="DEBUG",
+        format=LOG_FORMAT,
+        colorize=True,
+        enqueue=True,
+        filter=_keep,
+    )
+
+    # File handler: daily rotation, keep one week of logs
+    logger.add(
+        str(LOG_DIR / "bot_{time:YYYY-MM-DD}.log"),
+        rotation="00:00",            # rotate at midnight
+        retention=f"{RETENTION_DAYS} days",  # keep logs for 7 days
+        level="DEBUG",
+        format=FILE_FORMAT,
+        enqueue=True,
+        filter=_keep,
+    )
@@ -1,118 +1,130 @@
-from binance.enums import SIDE_BUY, SIDE_SELL
+from src.fanout import FanOut, load_accounts
+from src.state_journal import reconcile
+from src.coordinator import connect
+from src.latency_probe import LatencyProbe
+from src.resource_monitor import ResourceMonitor, process_age
+from src.snapshot import load_snapshot, save_snapshot
+from src.trader import Trader, SIDE_BUY, SIDE_SELL
+from src.recorder import note
 from src.strategy_loader import load_strategy
+from src.scan_priority import ScanPrioritizer
+from src.scanner import scan
+from src.candle_builder import CandleBuilder
+from src.data_engine import DataEngine
 from src.sheets_updater import update_sheet
-from src.trade_logger import log_trade
+from src.execution_report import execution_record, commission, fill_price, fill_time
+from src.trade_logger import log_trade, log_execution
 from src.notifier import send_email
 from src.config import config
-from src.logger import logger
-from src.trader import Trader
+from src.logger import logger, queue_stats
 from datetime import datetime
 from src.art import art
+import signal
+import atexit
 import time
+import sys
 
 
-def main():
-    logger.info("LET THE OBAMANATOR COOK...")
-    time.sleep(1)
-    print(art)
-    trader = Trader()
-    strategy = load_strategy(config.STRATEGY_NAME)
-    symbols = trader.get_available_pairs()
-    entry_time, exit_time = 0, 0
-    logger.info(f"{len(symbols)} trading pairs fetched")
-    logger.info(f"Looking for trades...")
+def poll_trade(account, strategy, coordinator, trade, ticker) -> bool:
+    """
+    Advance a journaled trade by one poll: wait for the entry fill (canceling if SL/TP is hit first),
+    then wait for the exit signal and close the position. `ticker` is the symbol's price for this poll,
+    shared by every account trading it.
 
-    while True:
-        for symbol in symbols:
-            candles = trader.get_candles(symbol, config.TIMEFRAME, limit=config.CANDLE_LIMIT)
-            if not candles:
-                continue
+    Returns:
+        bool: True once the trade is finished.
+    """
+    trader, journal = account.trader, account.journal
+    symbol, order_id = trade["symbol"], trade["order_id"]
+    side_enum = SIDE_BUY if trade["side"] == "LONG" else SIDE_SELL
+    if not ticker:
+        return False
 
-            signal, side, entry_price, stop_loss, target = strategy.entry_signal(symbol, candles)
-            if not signal:
-                continue
+    if trade["status"] == "pending":
+        last_close = float(ticker["price"])
 
-            side_enum = SIDE_BUY if side == "LONG" else SIDE_SELL
-            logger.info(f"{side_enum} Entry signal for {symbol} at {entry_price}, SL: {stop_loss}, TP: {target}")
-            trader.set_leverage(symbol, config.LEVERAGE)
-            quantity = trader.calculate_order_quantity(symbol, entry_price)
-            if quantity <= 0:
-                logger.warning(f"Trade amount too small for {symbol}; skipping..")
-                continue
+        order = trader.get_order(symbol, order_id)
+        if order and order["status"] == "FILLED":
+            entry_fill_price = fill_price(order, trade["entry_price"])
+            logger.info(f"Entry order filled at {entry_fill_price} (ID: {order_id})")
+            now = trader.clock.time()
+            journal.record("order_filled", order_id, entry_time=now,
+                           fill_time=fill_time(order, now), entry_fill_price=entry_fill_price)
+            logger.info(f"Monitoring {symbol} for exit...")
+            return False
+        if strategy.exit_signal(side_enum, last_close, trade["target"], trade["stop_loss"]):
+            logger.warning(f"SL/TP hit before fill for {symbol}; canceling order {order_id}")
+            trader.cancel_order(symbol, order_id)
+            journal.record("order_canceled", order_id)
+            coordinator.release(symbol, order_id)
+            return True
+        return False
 
-            order = trader.place_limit_order(
-                symbol=symbol, side=side_enum, quantity=quantity, price=entry_price
-            )
-            if not order:
-                logger.info(f"Looking for trades...")
-                continue
+    last_traded_price = ticker.get("price", None)
+    if not last_traded_price:
+        return False
+    if strategy.exit_signal(trade["side"], float(last_traded_price), trade["target"], trade["stop_loss"]):
+        trigger_time = trader.clock.time()
+        logger.info(f"Exit signal triggered for {symbol} (ID: {order_id})")
+        exit_order = trader.close_position(symbol, trade["quantity"], side_enum)
+        if not exit_order or exit_order.get("status") != "FILLED":
+            # The position is still open: keep it journaled and held, and try again on the next poll
+            logger.error(f"Close of {symbol} not filled (ID: {order_id}); retrying on the next poll")
+            return False
+        journal.record("position_closed", order_id, sync=True)
+        coordinator.release(symbol, order_id)
+        report_trade(trader, trade, exit_order, float(last_traded_price), trigger_time)
+        return True
+    return False
 
-            order_id = str(order["orderId"])
-            order_filled = False
-
-            while not order_filled:
-                time.sleep(5)
-                current = trader.get_ticker(symbol)
-                if not current:
-                    continue
-                last_close = float(current["price"])
-
-                if trader.check_order_filled(symbol, order_id):
-                    logger.info(f"Entry order filled at {entry_price} (ID: {order_id})")
-                    entry_time = time.time()
-                    order_filled = True
-                    break
-                if strategy.exit_signal(side_enum, last_close, target, stop_loss):
-                    logger.warning(f"SL/TP hit before fill for {symbol}; canceling order {order_id}")
-                    trader.cancel_order(symbol, order_id)
-                    break
-
-            if not order_filled:
-                logger.info(f"Looking for trades...")
-                continue
 
-            logger.info(f"Monitoring {symbol} for exit...")
-            while True:
-                time.sleep(5)
-                last_traded_price = trader.get_ticker(symbol).get("price", None)
-                if not last_traded_price:
-                    continue
-                if strategy.exit_signal(side, float(last_traded_price), target, stop_loss):
-                    logger.info(f"Exit signal triggered for {symbol} (ID: {order_id})")
-                    trader.close_position(symbol, quantity, side_enum)
-                    exit_time = time.time()
-                    break
-
-            trade_cost = config.TRADE_QUANTITY_USDT
-            exit_price = last_traded_price
-
-            # Calculate profit and risk-reward ratio based on side
-            if entry_price >= stop_loss:
-                risk_reward = (target - entry_price) / (entry_price - stop_loss)
-                profit = ((exit_price - entry_price) / entry_price) * trade_cost
-            else:
-                risk_reward = (entry_price - target) / (stop_loss - entry_price)
-                profit = ((entry_price - exit_price)/entry_price) * trade_cost
-            risk_reward = f"1:{round(risk_reward)}"
-
-            log_trade(
-                order_id=order_id,
-                side=side,
-                symbol=symbol,
-                cost=trade_cost,
-                quantity=quantity,
-                profit=profit,
-                risk_reward=risk_reward,
-                entry_price=entry_price,
-                exit_price=exit_price,
-                entry_time=entry_time,
-                exit_time=exit_time
-            )
-
-            email_body = f"""
+def report_trade(trader, trade, exit_order, trigger_price, trigger_time):
+    order_id, symbol, side = trade["order_id"], trade["symbol"], trade["side"]
+    stop_loss, target = trade["stop_loss"], trade["target"]
+    quantity, entry_time = trade["quantity"], trade["entry_time"]
+    trade_cost = trader.trade_quantity_usdt
+
+    # Actual fill prices, fees and timings of both legs
+    fills = trader.get_order_fills(symbol, order_id)
+    if exit_order:
+        fills += trader.get_order_fills(symbol, exit_order["orderId"])
+    execution = execution_record(trade, exit_order, trigger_price, trigger_time, commission(fills))
+    log_execution(execution)
+    logger.info(f"Execution costs for {symbol}: entry slippage {execution['entry_slippage_bps']} bps, "
+                f"exit polling {execution['exit_polling_bps']} bps, exit slippage {execution['exit_slippage_bps']} bps, "
+                f"fees {execution['fees_bps']} bps")
+    planned_entry = trade["entry_price"]
+    entry_price, exit_price = execution["entry_fill_price"], execution["exit_fill_price"]
+    exit_time = execution["exit_fill_time"]
+
+    # Calculate profit (on the actual fills) and risk-reward ratio (as planned) based on side
+    if planned_entry >= stop_loss:
+        risk_reward = (target - planned_entry) / (planned_entry - stop_loss)
+        profit = ((exit_price - entry_price) / entry_price) * trade_cost
+    else:
+        risk_reward = (planned_entry - target) / (stop_loss - planned_entry)
+        profit = ((entry_price - exit_price)/entry_price) * trade_cost
+    risk_reward = f"1:{round(risk_reward)}"
+
+    log_trade(
+        order_id=order_id,
+        side=side,
+        symbol=symbol,
+        cost=trade_cost,
+        quantity=quantity,
+        profit=profit,
+        risk_reward=risk_reward,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        entry_time=entry_time,
+        exit_time=exit_time
+    )
+
+    email_body = f"""
 Trade Completed!
 
 Order ID: {order_id}
+Account: {trader.name or "main"}
 Pair: {symbol}
 Side: {side}
 Cost: {trade_cost}
@@ -125,14 +137,223 @@ Exit Price: {exit_price}
 Entry Time: {datetime.fromtimestamp(entry_time)}
 Exit Time: {datetime.fromtimestamp(exit_time)}
 """
-            send_email(email_body)
-            logger.info(f"Trade complete for {symbol}, logged and notified.")
-            update_sheet(
-                csv_path=config.TEMP_TRADE_LOG_FILE,
-                sheet_name=config.GOOGLE_SHEET_NAME,
-                credentials_json=config.GOOGLE_CREDENTIALS_JSON
-            )
-        time.sleep(3)
+    send_email(email_body)
+    logger.info(f"Trade complete for {symbol}, logged and notified.")
+    update_sheet(
+        csv_path=config.TEMP_TRADE_LOG_FILE,
+        sheet_name=config.GOOGLE_SHEET_NAME,
+        credentials_json=config.GOOGLE_CREDENTIALS_JSON
+    )
+
+
+def run_trades(strategy, coordinator, positions):
+    """
+    Poll journaled trades, given as (account, trade) pairs, until every one of them is finished.
+    """
+    active = list(positions)
+    journals = {id(account.journal): account.journal for account, _ in active}.values()
+    clock = active[0][0].trader.clock if active else time  # every account's trader keeps the same clock
+    while active:
+        clock.sleep(5)
+        for journal in journals:
+            journal.tick()
+        # Trades another worker took over while this one was reaped must not be closed twice
+        handed_over = {(trade.get("account", ""), trade["order_id"]) for trade in coordinator.take_handed_over()}
+        for account, trade in active:
+            if (trade.get("account", ""), trade["order_id"]) in handed_over:
+                logger.warning(f"Stopped monitoring {trade['symbol']} trade {trade['order_id']}; another worker has it")
+                account.journal.record("handed_over", trade["order_id"], sync=True)
+        active = [(account, trade) for account, trade in active
+                  if (trade.get("account", ""), trade["order_id"]) not in handed_over]
+        # One price request per symbol, however many accounts trade it
+        tickers = {}
+        for account, trade in active:
+            if trade["symbol"] not in tickers:
+                tickers[trade["symbol"]] = account.trader.get_ticker(trade["symbol"])
+        active = [(account, trade) for account, trade in active
+                  if not poll_trade(account, strategy, coordinator, trade, tickers[trade["symbol"]])]
+    logger.info(f"Looking for trades...")
+
+
+def enter_trades(fanout, strategy, coordinator, entries):
+    """
+    Submit the entry orders for signals collected together on every account, then see the resulting
+    trades through.
+    """
+    positions = fanout.submit(entries)
+    traded = {trade["symbol"] for _, trade in positions}
+    # Signals that got no order on any account (rejected, failed requests, too small) give their slots back
+    for entry in entries:
+        if entry["symbol"] not in traded:
+            coordinator.release(entry["symbol"])
+    for _, trade in positions:
+        coordinator.hold(trade)
+    if not positions:
+        logger.info(f"Looking for trades...")
+        return
+    run_trades(strategy, coordinator, positions)
+
+
+def adopt_trades(fanout, trades):
+    """
+    Journal trades handed over from a worker that died, so they are monitored (and recovered) as our own.
+    """
+    positions = []
+    for trade in trades:
+        account = fanout.by_name.get(trade.get("account", ""))
+        if account is None:
+            logger.error(f"Adopted trade {trade['order_id']} belongs to unknown account {trade['account']}")
+            continue
+        fields = {k: v for k, v in trade.items() if k not in ("order_id", "status", "entry_time")}
+        account.journal.record("order_placed", trade["order_id"], **fields)
+        if trade["status"] == "open":
+            account.journal.record("order_filled", trade["order_id"], entry_time=trade["entry_time"])
+        account.journal.sync()
+        positions.append((account, account.journal.trades[trade["order_id"]]))
+        logger.info(f"Adopted {trade['status']} {trade['side']} trade on {trade['symbol']} (ID: {trade['order_id']})")
+    return positions
+
+
+def entries_due(entries, now: float) -> bool:
+    """
+    Whether collected signals should go out now: there are ENTRY_BATCH_SIZE of them or the oldest has waited
+    ENTRY_BATCH_WINDOW.
+    """
+    return bool(entries) and (len(entries) >= config.ENTRY_BATCH_SIZE
+                              or now - entries[0]["signal_time"] >= config.ENTRY_BATCH_WINDOW)
+
+
+def prepare_entry(trader, symbol, side, entry_price, stop_loss, target):
+    """
+    Turn an entry signal into an entry on the symbol's price grid, or None if it can't be traded.
+    """
+    # Snap to the tick grid once so every later comparison against exchange prices is exact
+    precision = trader.get_precision(symbol)
+    if not precision:
+        logger.error(f"Symbol filters not found for {symbol}")
+        return None
+    entry_ticks, stop_ticks, target_ticks = (
+        precision.price_to_ticks(p) for p in (entry_price, stop_loss, target)
+    )
+    entry_price, stop_loss, target = (
+        precision.ticks_to_price(t) for t in (entry_ticks, stop_ticks, target_ticks)
+    )
+
+    side_enum = SIDE_BUY if side == "LONG" else SIDE_SELL
+    logger.info(f"{side_enum} Entry signal for {symbol} at {precision.format_price(entry_ticks)}, "
+                f"SL: {precision.format_price(stop_ticks)}, TP: {precision.format_price(target_ticks)}")
+    # Quantity is sized per account when the entry is submitted
+    return {
+        "symbol": symbol,
+        "side": side_enum,
+        "strategy_side": side,
+        "price": entry_price,
+        "stop_loss": stop_loss,
+        "target": target,
+        "signal_time": trader.clock.time(),
+    }
+
+
+def main():
+    logger.info("LET THE OBAMANATOR COOK...")
+    print(art)
+    # Started first so tracemalloc sees the caches being built
+    resources = ResourceMonitor()
+    trader = Trader()
+    # Sync the clock before the first signed request, then keep sampling in the background
+    latency_probe = LatencyProbe(trader)
+    latency_probe.sample()
+    if config.EXCHANGE_MODE != "replay":  # probe requests would race the scan loop for recorded responses
+        latency_probe.start()
+    strategy = load_strategy(config.STRATEGY_NAME)
+    candle_builder = CandleBuilder(trader.get_candles, config.BASE_TIMEFRAME, clock=trader.exchange_time_ms)
+    # The strategy declares the timeframes it needs; the engine fetches and bundles them for it
+    engine = DataEngine(candle_builder, strategy.data_requirements(), trader.get_candles)
+    strategy.candle_builder = candle_builder
+    load_snapshot(config.SNAPSHOT_FILE, trader, candle_builder, config.SNAPSHOT_MAX_AGE)
+    # Every signal is traded on the main account and each extra account in ACCOUNTS
+    accounts = load_accounts(trader)
+    latency_probe.followers = [account.trader for account in accounts[1:]]
+    fanout = FanOut(accounts)
+    for account in accounts:
+        account.journal.recover()
+        # Persist warm state on any exit, including the SIGTERM sent on deploys
+        atexit.register(account.journal.close)
+    atexit.register(save_snapshot, config.SNAPSHOT_FILE, trader, candle_builder)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    last_snapshot = time.time()
+    first_scan = True
+
+    # Scans this process's shard of the pairs, or all of them when running alone
+    coordinator = connect(trader)
+    resumed = []
+    for account in accounts:
+        journal = account.journal
+        if not journal.trades:
+            continue
+        reconcile(journal, account.trader)
+        for trade in list(journal.trades.values()):
+            if not coordinator.hold(trade):
+                journal.record("handed_over", trade["order_id"], sync=True)
+                continue
+            logger.info(f"Resuming {trade['status']} {trade['side']} trade on {trade['symbol']} (ID: {trade['order_id']})")
+            resumed.append((account, trade))
+    if resumed:
+        run_trades(strategy, coordinator, resumed)
+
+    for account in accounts:
+        account.gateway.load_account_state()
+    prioritizer = ScanPrioritizer()
+
+    resources.register_gauge("candle_symbols", lambda: len(candle_builder))
+    resources.register_gauge("open_trades", lambda: sum(len(a.journal.trades) for a in accounts))
+    resources.register_gauge("log_queue", lambda: queue_stats()["queued"])
+    resources.register_gauge("log_dropped", lambda: queue_stats()["dropped"])
+    resources.register_shedder("candles", lambda: candle_builder.shed(coordinator.shard))
+    if getattr(strategy, "shed", None):
+        resources.register_shedder("strategy", strategy.shed)
+    logger.info(f"{len(coordinator.shard)} trading pairs fetched")
+    logger.info(f"Looking for trades...")
+
+    while True:
+        adopted = coordinator.take_adoptions()
+        if adopted:
+            for trade in adopted:
+                coordinator.hold(trade)
+            run_trades(strategy, coordinator, adopt_trades(fanout, adopted))
+
+        cycle_started = time.perf_counter()
+        entries = []
+        for signals in scan(strategy, engine, prioritizer, coordinator.shard):
+            for position, symbol, side, entry_price, stop_loss, target in signals:
+                note("decision", symbol=symbol, side=side, entry=entry_price, stop=stop_loss, target=target,
+                     position=position)
+                entry = prepare_entry(trader, symbol, side, entry_price, stop_loss, target)
+                # Global position and notional limits across every worker
+                if entry and coordinator.acquire(symbol, fanout.notional()):
+                    entries.append(entry)
+            # Signals found close together go out as one batch. Checked between chunks, so a lone signal waits
+            # at most ENTRY_BATCH_WINDOW plus one chunk, and entering (which monitors the trades until they
+            # finish) never leaves a chunk half evaluated: the next one is fetched afterwards
+            if entries_due(entries, trader.clock.time()):
+                enter_trades(fanout, strategy, coordinator, entries)
+                entries = []
+        if entries:
+            enter_trades(fanout, strategy, coordinator, entries)
+
+        note("cycle", ms=round((time.perf_counter() - cycle_started) * 1000, 3))
+        for account in accounts:
+            account.journal.tick()
+        resources.tick()
+        if first_scan:
+            started = process_age()
+            if started is not None:
+                logger.info(f"Time to first scan: {started:.1f}s")
+            first_scan = False
+        if time.time() - last_snapshot > config.SNAPSHOT_INTERVAL:
+            save_snapshot(config.SNAPSHOT_FILE, trader, candle_builder)
+            last_snapshot = time.time()
+        trader.clock.sleep(3)
         logger.info(f"Looking for trades...")
 
 if __name__ == "__main__":
@@ -5,11 +5,13 @@ from src.config import config
 from src.logger import logger
 
 
-def send_email(body: str):
+def send_email(body: str, subject: str = "You've had a trade! 🤑"):
     """
     Send an HTML email with a minimalistic, attractive design. The sender name will show as 'Terminator'.
     """
-    subject = "You've had a trade! 🤑"
+    if config.SIMULATED:
+        logger.debug(f"{config.EXCHANGE_MODE.capitalize()}: not sending email '{subject}'")
+        return
     try:
         # Create message container with correct MIME types
         msg = MIMEMultipart('alternative')
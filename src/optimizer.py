@@ -0,0 +1,326 @@
+from src.strategy.liquidity_sweep_strategy import LiquiditySweepStrategy
+from src.strategy.indicator_state import IndicatorState
+from src.candle_builder import CandleBuilder, interval_ms
+from concurrent.futures import ProcessPoolExecutor
+from src.config import config
+from src.logger import logger
+from bisect import bisect_left
+import itertools
+import argparse
+import random
+import heapq
+import time
+import csv
+
+DEFAULT_GRID = {
+    "exclude_last": [3, 5, 7],
+    "swing_spacing": [3, 5, 8],
+    "fvg_lookback": [30, 50],
+    "stop_buffer": [0.0005, 0.001, 0.002],
+    "reward_ratio": [2, 3, 4],
+    "key_margin": [5, 10],
+}
+# Parameters used by the higher timeframe sweep stage; combinations that share them share its results
+SWEEP_PARAMS = ("exclude_last", "swing_spacing")
+ROUND_TRIP_FEE = 0.0007  # Maker entry + taker exit, as a fraction of notional
+
+CSV_FIELDS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+# History storage
+def history_path(symbol: str, interval: str):
+    return config.HISTORY_DIR / f"{symbol}_{interval}.csv"
+
+
+def save_history(symbol: str, interval: str, candles: list):
+    path = history_path(symbol, interval)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(candles)
+
+
+def load_history(symbol: str, interval: str) -> list:
+    with open(history_path(symbol, interval), newline="") as f:
+        return [
+            {"timestamp": int(row["timestamp"]), **{k: float(row[k]) for k in CSV_FIELDS[1:]}}
+            for row in csv.DictReader(f)
+        ]
+
+
+def download_history(trader, symbol: str, interval: str, days: int) -> list:
+    """
+    Page through `days` of closed candles for `symbol` and store them under HISTORY_DIR.
+    """
+    step = interval_ms(interval)
+    now = int(time.time() * 1000)
+    start = now - days * 24 * 60 * 60 * 1000
+    candles = []
+    while start < now:
+        page = trader.get_candles(symbol, interval, limit=1500, start_time=start)
+        if not page:
+            break
+        candles.extend(page)
+        start = page[-1]["timestamp"] + step
+    candles = [c for c in candles if c["timestamp"] + step <= now]  # drop the forming candle
+    save_history(symbol, interval, candles)
+    logger.info(f"Stored {len(candles)} {interval} candles for {symbol}")
+    return candles
+
+
+def build_windows(candles: list, base_interval: str) -> list:
+    """
+    Replay base candles through a CandleBuilder and keep the (higher, lower) timeframe windows the live
+    loop would have seen after each base candle closed. None where the history is still too short.
+    """
+    builder = CandleBuilder(None, base_interval)
+    builder.track(config.TIMEFRAME, config.CANDLE_LIMIT)
+    builder.track(config.LOWER_TIMEFRAME, config.LOWER_CANDLE_LIMIT)
+    windows = []
+    for candle in candles:
+        builder.update("", [candle])
+        htf = builder.get_candles("", config.TIMEFRAME, config.CANDLE_LIMIT)
+        if len(htf) < config.CANDLE_LIMIT:
+            windows.append(None)
+            continue
+        windows.append((htf, builder.get_candles("", config.LOWER_TIMEFRAME, config.LOWER_CANDLE_LIMIT)))
+    return windows
+
+
+# Per-process state, filled once by the pool initializer
+_HISTORY = {}   # symbol -> base candles
+_TIMESTAMPS = {}  # symbol -> open time of each base candle
+_WINDOWS = {}   # symbol -> windows from build_windows
+
+
+def _init_worker(symbols: list, base_interval: str):
+    for symbol in symbols:
+        _HISTORY[symbol] = load_history(symbol, base_interval)
+        _TIMESTAMPS[symbol] = [c["timestamp"] for c in _HISTORY[symbol]]
+        _WINDOWS[symbol] = build_windows(_HISTORY[symbol], base_interval)
+
+
+def _play_trade(candles: list, start: int, end: int, side: str, entry: float, stop: float, target: float):
+    """
+    Walk candles from `start`: fill when price touches the entry, cancel if SL/TP is touched first, then
+    exit at whichever of SL/TP is touched (SL when both are inside the same candle).
+
+    Returns:
+        tuple: (return as a fraction of entry or None if never filled/closed, index of the last candle used)
+    """
+    long = side == "LONG"
+    filled = False
+    for j in range(start, end):
+        c = candles[j]
+        hit_stop = c['low'] <= stop if long else c['high'] >= stop
+        hit_target = c['high'] >= target if long else c['low'] <= target
+        if not filled:
+            if (c['low'] <= entry) if long else (c['high'] >= entry):
+                filled = True
+            elif hit_stop or hit_target:
+                return None, j
+            else:
+                continue
+        if hit_stop:
+            exit_price = stop
+        elif hit_target:
+            exit_price = target
+        else:
+            continue
+        ret = (exit_price - entry) / entry if long else (entry - exit_price) / entry
+        return ret - ROUND_TRIP_FEE, j
+    return None, end
+
+
+class WindowCache:
+    """
+    Detector results per history window that the swept parameters don't affect, shared by the combinations
+    of one task and dropped with it:
+    - the higher timeframe sweep, keyed on the sweep-stage parameters (SWEEP_PARAMS)
+    - the lower timeframe entry setup (key candle, FVGs, violations), which no parameter affects
+    Both are computed by the live strategy's own stages on incrementally synced indicator state.
+    """
+
+    def __init__(self):
+        self.sweeps = {}  # (symbol, index, exclude_last, swing_spacing) -> (side, swing_point, key_index)
+        self.setups = {}  # (symbol, index, side) -> LiquiditySweepStrategy.entry_setup result
+        self._states = {}  # (symbol, timeframe) -> IndicatorState
+
+    def _state(self, symbol: str, timeframe: str, candles: list) -> IndicatorState:
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            state = self._states[(symbol, timeframe)] = IndicatorState(len(candles))
+        state.sync(candles)
+        return state
+
+    def sweep(self, strategy: LiquiditySweepStrategy, symbol: str, index: int, candles: list) -> tuple:
+        key = (symbol, index, *(getattr(strategy, name) for name in SWEEP_PARAMS))
+        sweep = self.sweeps.get(key)
+        if sweep is None:
+            sweep = self.sweeps[key] = strategy.detect_sweep(self._state(symbol, config.TIMEFRAME, candles))
+        return sweep
+
+    def setup(self, symbol: str, index: int, side: str, candles: list):
+        key = (symbol, index, side)
+        if key not in self.setups:
+            state = self._state(symbol, config.LOWER_TIMEFRAME, candles)
+            self.setups[key] = LiquiditySweepStrategy.entry_setup(state, side)
+        return self.setups[key]
+
+
+def _backtest(strategy: LiquiditySweepStrategy, cache: WindowCache, symbol: str, start_ts: int, end_ts: int) -> list:
+    """
+    Returns:
+        list: (exit timestamp, return) for every closed trade of `symbol` between the two timestamps.
+    """
+    candles, windows = _HISTORY[symbol], _WINDOWS[symbol]
+    timestamps = _TIMESTAMPS[symbol]
+    i, end = bisect_left(timestamps, start_ts), bisect_left(timestamps, end_ts)
+    trades = []
+    while i < end:
+        window = windows[i]
+        if window is None:
+            i += 1
+            continue
+        # Same two stages as the live `evaluate`, with the parameter-free parts cached per window
+        side, _, _ = cache.sweep(strategy, symbol, i, window[0])
+        if side:
+            valid, entry, stop, target = strategy.apply_entry_setup(cache.setup(symbol, i, side, window[1]), side)
+            if valid:
+                ret, last = _play_trade(candles, i + 1, end, side, entry, stop, target)
+                if ret is not None:
+                    trades.append((candles[last]["timestamp"], ret))
+                i = last + 1
+                continue
+        i += 1
+    return trades
+
+
+def _summarize(params: dict, trades: list) -> dict:
+    profit, peak, drawdown, wins = 0.0, 0.0, 0.0, 0
+    for _, ret in trades:
+        profit += ret * config.TRADE_QUANTITY_USDT
+        peak = max(peak, profit)
+        drawdown = max(drawdown, peak - profit)
+        wins += ret > 0
+    return {
+        "params": params,
+        "pnl": profit,
+        "max_drawdown": drawdown,
+        "trades": len(trades),
+        "win_rate": wins / len(trades) if trades else 0.0,
+    }
+
+
+def _evaluate_group(task) -> list:
+    combos, symbols, start_ts, end_ts = task
+    cache = WindowCache()
+    results = []
+    for params in combos:
+        strategy = LiquiditySweepStrategy(**params)
+        per_symbol = [_backtest(strategy, cache, symbol, start_ts, end_ts) for symbol in symbols]
+        results.append(_summarize(params, list(heapq.merge(*per_symbol))))
+    return results
+
+
+def grid(space: dict) -> list:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def sample(space: dict, n: int, seed: int = None) -> list:
+    combos = grid(space)
+    return random.Random(seed).sample(combos, min(n, len(combos)))
+
+
+def rank_results(results: list) -> list:
+    """
+    Best first: highest PnL, ties broken by the smaller drawdown.
+    """
+    return sorted(results, key=lambda r: (-r["pnl"], r["max_drawdown"]))
+
+
+def run_sweep(pool, combos: list, symbols: list, start_ts: int, end_ts: int) -> list:
+    """
+    Evaluate every combination over [start_ts, end_ts). Combinations that share the sweep-stage parameters
+    go to the same task so they reuse its cached sweep detections and entry setups.
+    """
+    groups = {}
+    for params in combos:
+        groups.setdefault(tuple(params[k] for k in SWEEP_PARAMS), []).append(params)
+    tasks = [(group, symbols, start_ts, end_ts) for group in groups.values()]
+    results = []
+    for group_results in pool.map(_evaluate_group, tasks):
+        results.extend(group_results)
+    return rank_results(results)
+
+
+def walk_forward(pool, combos: list, symbols: list, start_ts: int, end_ts: int, folds: int) -> list:
+    """
+    Split the span into folds + 1 equal segments; for each fold, pick the best combination on one segment
+    and score it on the next one.
+    """
+    segment = (end_ts - start_ts) // (folds + 1)
+    report = []
+    for k in range(folds):
+        train_start = start_ts + k * segment
+        test_start, test_end = train_start + segment, train_start + 2 * segment
+        best = run_sweep(pool, combos, symbols, train_start, test_start)[0]
+        test = run_sweep(pool, [best["params"]], symbols, test_start, test_end)[0]
+        report.append({"fold": k, "train": best, "test": test})
+        logger.info(f"Fold {k}: train PnL {best['pnl']:.2f} -> test PnL {test['pnl']:.2f} with {best['params']}")
+    return report
+
+
+def _print_results(results: list, top: int):
+    print(f"{'pnl':>10} {'max_dd':>10} {'trades':>7} {'win%':>6}  params")
+    for r in results[:top]:
+        print(f"{r['pnl']:>10.2f} {r['max_drawdown']:>10.2f} {r['trades']:>7} {r['win_rate'] * 100:>6.1f}  {r['params']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweeps for LiquiditySweepStrategy")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    download = sub.add_parser("download", help="Store candle history for the given symbols")
+    download.add_argument("symbols", nargs="+")
+    download.add_argument("--days", type=int, default=30)
+
+    sweep = sub.add_parser("sweep", help="Grid or random search over DEFAULT_GRID")
+    sweep.add_argument("symbols", nargs="+")
+    sweep.add_argument("--random", type=int, default=0, help="Sample this many combinations instead of the full grid")
+    sweep.add_argument("--seed", type=int, default=None)
+    sweep.add_argument("--folds", type=int, default=0, help="Walk-forward folds; 0 evaluates the whole history")
+    sweep.add_argument("--workers", type=int, default=None)
+    sweep.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "download":
+        from src.trader import Trader
+        trader = Trader()
+        for symbol in args.symbols:
+            download_history(trader, symbol, config.BASE_TIMEFRAME, args.days)
+        return
+
+    combos = sample(DEFAULT_GRID, args.random, args.seed) if args.random else grid(DEFAULT_GRID)
+    spans = [load_history(symbol, config.BASE_TIMEFRAME) for symbol in args.symbols]
+    start_ts = max(candles[0]["timestamp"] for candles in spans)
+    end_ts = min(candles[-1]["timestamp"] for candles in spans) + 1
+    del spans
+    logger.info(f"Evaluating {len(combos)} combinations on {len(args.symbols)} symbols")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.symbols, config.BASE_TIMEFRAME)) as pool:
+        if args.folds:
+            for fold in walk_forward(pool, combos, args.symbols, start_ts, end_ts, args.folds):
+                print(f"Fold {fold['fold']}")
+                _print_results([fold["train"], fold["test"]], 2)
+        else:
+            _print_results(run_sweep(pool, combos, args.symbols, start_ts, end_ts), args.top)
+    logger.info(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from src.config import config
+from src.logger import logger
+import time
+
+BATCH_ORDER_LIMIT = 5  # Most orders Binance accepts in one batchOrders request
+
+
+class OrderGateway:
+    """
+    Sits between the trade loop and `Trader` for order submission.
+
+    Keeps per-symbol leverage and margin type so leverage is only changed when it differs, and groups
+    orders that are ready at the same time into batchOrders requests.
+    """
+
+    def __init__(self, trader):
+        self.trader = trader
+        self.leverage = {}      # symbol -> leverage currently set on the account
+        self.margin_type = {}   # symbol -> "CROSSED" / "ISOLATED"
+        self._loaded = 0
+
+    def load_account_state(self):
+        """
+        Load leverage and margin type for every symbol with one bulk symbol config request.
+        """
+        self._loaded = self.trader.clock.time()
+        symbols = self.trader.get_symbol_config()
+        if symbols is None:
+            logger.warning("Could not load account leverage; it will be set on every entry")
+            return
+        self.leverage = {s["symbol"]: int(s["leverage"]) for s in symbols}
+        self.margin_type = {s["symbol"]: s["marginType"] for s in symbols}
+        logger.info(f"Loaded leverage for {len(self.leverage)} symbols")
+
+    def ensure_leverage(self, symbol: str, leverage: int) -> bool:
+        # Re-read now and then so leverage changed outside the bot is picked up
+        if self.trader.clock.time() - self._loaded > config.ACCOUNT_STATE_MAX_AGE:
+            self.load_account_state()
+        if self.leverage.get(symbol) == leverage:
+            return True
+        if not self.trader.set_leverage(symbol, leverage):
+            self.leverage.pop(symbol, None)  # unknown now; set it again on the next entry
+            return False
+        self.leverage[symbol] = leverage
+        return True
+
+    def submit_entries(self, entries: list, leverage: int) -> list:
+        """
+        Place limit entry orders, batching them in groups of BATCH_ORDER_LIMIT.
+
+        Args:
+            entries: Dicts with 'symbol', 'side', 'quantity' and 'price'.
+            leverage: Leverage each symbol must be set to before its order goes out.
+
+        Returns:
+            list: The order response for each entry, or None where it was not placed.
+        """
+        results = [None] * len(entries)
+        ready = []  # (index, params)
+        for i, entry in enumerate(entries):
+            if not self.ensure_leverage(entry["symbol"], leverage):
+                continue
+            params = self.trader.limit_order_params(entry["symbol"], entry["side"], entry["quantity"], entry["price"])
+            if params:
+                ready.append((i, params))
+
+        for start in range(0, len(ready), BATCH_ORDER_LIMIT):
+            chunk = ready[start:start + BATCH_ORDER_LIMIT]
+            if len(chunk) == 1:
+                i, params = chunk[0]
+                entry = entries[i]
+                results[i] = self.trader.place_limit_order(entry["symbol"], entry["side"], entry["quantity"], entry["price"])
+                continue
+
+            started = time.perf_counter()
+            responses = self.trader.place_batch_orders([params for _, params in chunk])
+            if responses is None:
+                # The request itself failed, so none of them were placed; send them one at a time instead
+                logger.warning(f"Batch of {len(chunk)} orders failed; placing them one by one")
+                for i, _ in chunk:
+                    entry = entries[i]
+                    results[i] = self.trader.place_limit_order(entry["symbol"], entry["side"], entry["quantity"], entry["price"])
+                continue
+            for (i, params), response in zip(chunk, responses):
+                if "orderId" in response:
+                    results[i] = response
+                else:
+                    logger.error(f"Batch order for {params['symbol']} rejected: {response.get('msg', response)}")
+            logger.info(f"Placed {sum(1 for i, _ in chunk if results[i])}/{len(chunk)} orders in one batch "
+                        f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return results
@@ -0,0 +1,102 @@
+from decimal import Decimal, ROUND_FLOOR
+
+
+def _decimals(step: str) -> int:
+    """
+    Number of decimal places needed to write `step` exactly, e.g. "0.00100000" -> 3.
+    """
+    if "." not in step:
+        return 0
+    return len(step.rstrip("0").split(".")[1])
+
+
+def _floor_units(value: float, decimals: int) -> int:
+    """
+    `value` rounded down to a whole number of 10**-decimals units. The float's shortest repr is read as the
+    decimal it stands for, so a price already on the grid never loses a tick to float error whatever its size
+    (0.29 * 100 is 28.999999999999996 in floats).
+    """
+    return int(Decimal(repr(value)).scaleb(decimals).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def _units(step: str, decimals: int) -> int:
+    """
+    `step` as an integer count of 10**-decimals units, parsed from the string so no float is involved.
+    """
+    whole, _, frac = step.partition(".")
+    frac = (frac + "0" * decimals)[:decimals]
+    return int(whole or "0") * 10 ** decimals + int(frac or "0")
+
+
+class SymbolPrecision:
+    """
+    Integer tick/step arithmetic for one symbol.
+
+    Prices are represented as a number of ticks and quantities as a number of lot steps. The scale factors
+    are derived once from the exchange filter strings, after which quantizing, comparing and formatting
+    are plain integer operations.
+    """
+
+    def __init__(self, tick_size: str, step_size: str, min_qty: str):
+        self.price_decimals = _decimals(tick_size)
+        self.price_scale = 10 ** self.price_decimals
+        self.tick = _units(tick_size, self.price_decimals)  # tick size in 10**-price_decimals units
+
+        self.qty_decimals = max(_decimals(step_size), _decimals(min_qty))
+        self.qty_scale = 10 ** self.qty_decimals
+        self.step = _units(step_size, self.qty_decimals)
+        self.min_steps = -(-_units(min_qty, self.qty_decimals) // self.step)
+
+    @classmethod
+    def from_symbol_info(cls, info: dict):
+        filters = {f['filterType']: f for f in info['filters']}
+        return cls(
+            tick_size=filters['PRICE_FILTER']['tickSize'],
+            step_size=filters['LOT_SIZE']['stepSize'],
+            min_qty=filters['LOT_SIZE']['minQty'],
+        )
+
+    # Prices
+    def price_to_ticks(self, price: float) -> int:
+        """
+        Round `price` down to a whole number of ticks.
+        """
+        return _floor_units(price, self.price_decimals) // self.tick
+
+    def ticks_to_price(self, ticks: int) -> float:
+        # int / int is correctly rounded, so this equals float() of the exact decimal price
+        return ticks * self.tick / self.price_scale
+
+    def format_price(self, ticks: int) -> str:
+        return _format(ticks * self.tick, self.price_decimals)
+
+    # Quantities
+    def qty_to_steps(self, quantity: float) -> int:
+        """
+        Round `quantity` down to a whole number of lot steps.
+        """
+        return _floor_units(quantity, self.qty_decimals) // self.step
+
+    def steps_to_qty(self, steps: int) -> float:
+        return steps * self.step / self.qty_scale
+
+    def format_qty(self, steps: int) -> str:
+        return _format(steps * self.step, self.qty_decimals)
+
+    def steps_for_notional(self, notional: float, price_ticks: int) -> int:
+        """
+        Largest number of lot steps whose value at `price_ticks` does not exceed `notional`.
+        """
+        step_value = price_ticks * self.tick * self.step  # in 10**-(price_decimals + qty_decimals) units
+        if step_value <= 0:
+            return 0
+        budget = _floor_units(notional, self.price_decimals + self.qty_decimals)
+        return budget // step_value
+
+
+def _format(units: int, decimals: int) -> str:
+    if decimals == 0:
+        return str(units)
+    sign = "-" if units < 0 else ""
+    whole, frac = divmod(abs(units), 10 ** decimals)
+    return f"{sign}{whole}.{frac:0{decimals}d}"
@@ -0,0 +1,276 @@
+from collections import defaultdict, deque
+from src.latency_probe import percentile
+from src.config import config
+from src.logger import logger
+from pathlib import Path
+import threading
+import argparse
+import gzip
+import json
+import time
+
+_session = None  # ExchangeLog that note() writes to, if recording or replaying
+
+
+class ReplayFinished(SystemExit):
+    """Raised once the recorded market data is used up; exits the unmodified loop like sys.exit."""
+
+
+class ReplayedError(Exception):
+    """Stands in for an exception the exchange client raised during recording."""
+
+
+class ExchangeLog:
+    """
+    Gzipped JSON lines, one per request/response or note. Writes from the probe thread and the main loop
+    are serialised; the buffer is flushed every `flush_every` entries and on close.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 100):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self._file = gzip.open(path, "at", compresslevel=6)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_log(path: Path) -> list:
+    entries = []
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # truncated tail from an unclean shutdown
+    return entries
+
+
+def note(kind: str, **fields):
+    """
+    Add a marker (scan cycle timing, trade decision...) to the current recording or replay session.
+    """
+    if _session is not None:
+        _session.write({"t": time.time(), "k": kind, **fields})
+
+
+def _open_session(path: Path) -> ExchangeLog:
+    global _session
+    if _session is None:
+        import atexit
+        _session = ExchangeLog(path)
+        atexit.register(_session.close)
+    return _session
+
+
+class RecordingClient:
+    """
+    Wraps a Binance client and logs every futures_* call with its arguments, result or error, start time
+    and duration.
+    """
+
+    def __init__(self, client, log: ExchangeLog):
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_log", log)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not name.startswith("futures_") or not callable(attr):
+            return attr
+
+        def call(**kwargs):
+            entry = {"t": time.time(), "m": name, "a": json.loads(json.dumps(kwargs))}
+            started = time.perf_counter()
+            try:
+                result = attr(**kwargs)
+            except Exception as e:
+                entry.update(d=round((time.perf_counter() - started) * 1000, 3), e=f"{type(e).__name__}: {e}")
+                self._log.write(entry)
+                raise
+            entry.update(d=round((time.perf_counter() - started) * 1000, 3), r=result)
+            self._log.write(entry)
+            return result
+        return call
+
+    def __setattr__(self, name, value):
+        # timestamp_offset / REQUEST_RECVWINDOW set by the latency probe belong to the real client
+        setattr(self._client, name, value)
+
+
+class ReplayClock:
+    """
+    Virtual wall clock for replays. It jumps to the recorded time of each served response, and sleeps
+    advance it instantly (or `speed` times faster than real time).
+    """
+
+    def __init__(self, start: float, speed: float):
+        self.now = start
+        self.speed = speed
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        if self.speed > 0:
+            time.sleep(seconds / self.speed)
+
+    def advance_to(self, timestamp: float):
+        self.now = max(self.now, timestamp)
+
+
+class ReplayClient:
+    """
+    Serves recorded responses in their recorded order instead of calling the exchange.
+
+    A call is matched to the next unused record with the same method and arguments, falling back to the next
+    one for the same method and symbol, since request sizes depend on the clock. Once every recorded kline
+    response has been served the replay ends with ReplayFinished.
+    """
+
+    def __init__(self, entries: list, clock: ReplayClock):
+        object.__setattr__(self, "_records", [e for e in entries if "m" in e])
+        object.__setattr__(self, "_clock", clock)
+        object.__setattr__(self, "_lock", threading.Lock())
+        exact, loose, remaining = defaultdict(deque), defaultdict(deque), defaultdict(int)
+        for i, record in enumerate(self._records):
+            exact[(record["m"], self._key(record["a"]))].append(i)
+            loose[(record["m"], record["a"].get("symbol"))].append(i)
+            remaining[record["m"]] += 1
+        object.__setattr__(self, "_exact", exact)
+        object.__setattr__(self, "_loose", loose)
+        object.__setattr__(self, "_remaining", remaining)
+        object.__setattr__(self, "_used", bytearray(len(self._records)))
+
+    @staticmethod
+    def _key(kwargs: dict) -> str:
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def _take(self, queue):
+        while queue:
+            i = queue.popleft()
+            if not self._used[i]:
+                self._used[i] = 1
+                return i
+        return None
+
+    def _serve(self, name: str, kwargs: dict):
+        with self._lock:
+            i = self._take(self._exact.get((name, self._key(kwargs))))
+            if i is None:
+                i = self._take(self._loose.get((name, kwargs.get("symbol"))))
+            if i is None:
+                if name == "futures_klines" and not self._remaining[name]:
+                    raise ReplayFinished("Replay finished: recorded market data exhausted")
+                raise ReplayedError(f"No recorded response for {name}({kwargs})")
+            self._remaining[name] -= 1
+            record = self._records[i]
+        self._clock.advance_to(record["t"] + record.get("d", 0) / 1000)
+        if "e" in record:
+            raise ReplayedError(record["e"])
+        return record["r"]
+
+    def __getattr__(self, name):
+        if not name.startswith("futures_"):
+            raise AttributeError(name)
+        return lambda **kwargs: self._serve(name, kwargs)
+
+    def __setattr__(self, name, value):
+        pass  # clock corrections have nothing to act on in a replay
+
+
+_replay_client = None
+
+
+def recording_client(client) -> RecordingClient:
+    return RecordingClient(client, _open_session(config.EXCHANGE_LOG))
+
+
+def replay_client() -> ReplayClient:
+    """
+    The process-wide replay client. The first call loads the log, sets up the replay clock and starts a
+    fresh session log under RECORDS_DIR for the replay's own markers.
+    """
+    global _replay_client
+    if _replay_client is None:
+        entries = read_log(config.EXCHANGE_LOG)
+        if not entries:
+            raise ReplayFinished(f"Nothing to replay in {config.EXCHANGE_LOG}")
+        for stale in (config.SNAPSHOT_FILE, config.JOURNAL_FILE):
+            if stale.exists():
+                stale.unlink()
+        clock = ReplayClock(entries[0]["t"], config.REPLAY_SPEED)
+        session = config.RECORDS_DIR / f"session_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+        _open_session(session)
+        _replay_client = ReplayClient(entries, clock)
+        logger.info(f"Replaying {len(_replay_client._records)} recorded responses from {config.EXCHANGE_LOG} "
+                    f"into {session}")
+    return _replay_client
+
+
+def replay_clock() -> ReplayClock:
+    """
+    The replay's virtual clock, for `Trader.clock`. Only exchange-facing timing follows it; logs, journal
+    fsyncs and coordinator heartbeats keep the real clock.
+    """
+    return replay_client()._clock
+
+
+def summarize(path: Path) -> dict:
+    notes = [e for e in read_log(path) if "k" in e]
+    cycles = [n["ms"] for n in notes if n["k"] == "cycle"]
+    return {
+        "cycles": cycles,
+        "decisions": [n for n in notes if n["k"] == "decision"],
+    }
+
+
+def compare(baseline: Path, candidate: Path):
+    """
+    Print scan-cycle latency percentiles and the trade decisions of two sessions side by side.
+    """
+    a, b = summarize(baseline), summarize(candidate)
+    print(f"{'scan cycle ms':<16}{'baseline':>12}{'candidate':>12}")
+    for label, q in (("p50", 50), ("p90", 90), ("p99", 99)):
+        print(f"{label:<16}{percentile(a['cycles'], q):>12.1f}{percentile(b['cycles'], q):>12.1f}")
+    print(f"{'cycles':<16}{len(a['cycles']):>12}{len(b['cycles']):>12}")
+
+    def describe(d):
+        return f"{d['symbol']} {d['side']} @ {d['entry']}" if d else "-"
+
+    print(f"\n{'':<4}{'baseline decisions':<40}{'candidate decisions':<40}")
+    rows = max(len(a["decisions"]), len(b["decisions"]))
+    for i in range(rows):
+        left = a["decisions"][i] if i < len(a["decisions"]) else None
+        right = b["decisions"][i] if i < len(b["decisions"]) else None
+        same = left and right and all(left[k] == right[k] for k in ("symbol", "side", "entry", "stop", "target"))
+        print(f"{'' if same else '*':<4}{describe(left):<40}{describe(right):<40}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded or replayed exchange sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmp = sub.add_parser("compare", help="Compare scan-cycle latency and decisions of two sessions")
+    cmp.add_argument("baseline", type=Path)
+    cmp.add_argument("candidate", type=Path)
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.baseline, args.candidate)
+
+
+if __name__ == "__main__":
+    main()
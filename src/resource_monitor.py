@@ -0,0 +1,293 @@
+from datetime import datetime, timezone
+from src.config import config
+from src.logger import logger
+from functools import lru_cache
+from pathlib import Path
+import tracemalloc
+import threading
+import argparse
+import resource
+import json
+import time
+import gc
+import os
+
+MB = 1024 * 1024
+
+# Subsystem of each source file (first match wins)
+SUBSYSTEMS = [
+    ("strategy", ("/src/strategy/", "/src/scan_priority.py")),
+    ("candles", ("/src/candle_builder.py", "/src/data_engine.py", "/src/snapshot.py")),
+    ("trader", ("/src/trader.py", "/src/order_gateway.py", "/src/precision.py", "/src/fanout.py",
+                "/src/synthetic.py", "/binance/", "/requests/", "/urllib3/")),
+    ("notifier", ("/src/notifier.py", "/src/sheets_updater.py", "/gspread/", "/google/", "/smtplib.py", "/email/")),
+    ("logging", ("/src/logger.py", "/loguru/")),
+    ("journal", ("/src/state_journal.py", "/src/recorder.py", "/src/trade_logger.py", "/src/execution_report.py")),
+]
+# Subsystems that fetch data for their callers; what they return belongs to the caller that keeps it
+PASS_THROUGH = ("trader",)
+# Allocations made by tracemalloc itself or the import machinery are not counted
+UNTRACKED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+
+
+@lru_cache(maxsize=None)  # a few hundred source files, looked up for every frame of every trace
+def subsystem(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    for name, patterns in SUBSYSTEMS:
+        if any(p in path for p in patterns):
+            return name
+    return "other"
+
+
+def owner(traceback) -> str:
+    """
+    Subsystem that keeps an allocation: the innermost frame outside PASS_THROUGH, or the innermost
+    recognised frame when the stack has none. Candles parsed by the trader for the candle cache so count
+    as candles, while exchange metadata the trader caches for itself stays with the trader.
+    """
+    fallback = "other"
+    for frame in reversed(traceback):  # tracemalloc lists the oldest frame first
+        name = subsystem(frame.filename)
+        if name == "other":
+            continue
+        if name not in PASS_THROUGH:
+            return name
+        if fallback == "other":
+            fallback = name
+    return fallback
+
+
+def process_usage() -> dict:
+    """
+    Resident memory (MB), peak resident memory (MB), open file descriptors, sockets and threads.
+    Read from /proc on Linux, psutil elsewhere when it is installed.
+    """
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+    usage = {"rss_mb": None, "peak_rss_mb": round(peak_kb / 1024, 1), "fds": None, "sockets": None,
+             "threads": threading.active_count()}
+    if os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            usage["rss_mb"] = round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB, 1)
+        fds = sockets = 0
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                target = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError:
+                continue  # closed while listing
+            fds += 1
+            sockets += target.startswith("socket:")
+        usage.update(fds=fds, sockets=sockets)
+        return usage
+    try:
+        import psutil
+    except ImportError:
+        usage["rss_mb"] = usage["peak_rss_mb"]
+        return usage
+    process = psutil.Process()
+    usage["rss_mb"] = round(process.memory_info().rss / MB, 1)
+    usage["fds"] = process.num_fds() if hasattr(process, "num_fds") else process.num_handles()
+    usage["sockets"] = len(process.net_connections())
+    return usage
+
+
+def process_age():
+    """
+    Seconds since the process started, interpreter start-up and imports included. Read from /proc on Linux,
+    psutil elsewhere; None when neither is available.
+    """
+    if os.path.exists("/proc/self/stat"):
+        with open("/proc/self/stat") as f:
+            # Fields after "pid (comm)" start at the 3rd; the 22nd is the start time in clock ticks after boot
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            return float(f.read().split()[0]) - started
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return time.time() - psutil.Process().create_time()
+
+
+class ResourceMonitor:
+    """
+    Periodic record of memory, file descriptors and sockets for long runs, with per-subsystem memory budgets.
+
+    `tick()` is called from the scan loop and takes a snapshot every `interval` seconds:
+    - RSS, open FDs and sockets
+    - tracemalloc memory per subsystem and the top allocation sites
+    - any registered gauges, such as cache sizes
+    Each snapshot is appended to RESOURCE_LOG as one JSON line, which `diff` compares.
+
+    A subsystem over its MEMORY_BUDGETS entry (MB) logs a warning. With SHED_ON_BUDGET its registered
+    shedders then drop their caches, and "rss" sheds everything. Shedding runs on the scan loop's thread
+    because of `tick()`, so caches are never cleared while they are in use.
+    """
+
+    def __init__(self, interval: float = config.RESOURCE_INTERVAL, path: Path = config.RESOURCE_LOG,
+                 budgets: dict = config.MEMORY_BUDGETS):
+        self.interval = interval
+        self.path = Path(path)
+        self.budgets = budgets
+        self.started = time.time()
+        self.last_snapshot = None
+        self._last_sample = 0
+        self._shedders = {}  # subsystem -> [callables that drop caches and return what they freed]
+        self._gauges = {}    # name -> callable returning a number
+        if config.RESOURCE_TRACEMALLOC and not tracemalloc.is_tracing():
+            # Deep enough to see past the trader and stdlib frames to the code that keeps the data
+            tracemalloc.start(config.RESOURCE_TRACE_DEPTH)
+
+    def register_shedder(self, subsystem_name: str, shed):
+        self._shedders.setdefault(subsystem_name, []).append(shed)
+
+    def register_gauge(self, name: str, read):
+        self._gauges[name] = read
+
+    def tick(self):
+        if time.time() - self._last_sample >= self.interval:
+            self.sample()
+
+    def sample(self) -> dict:
+        self._last_sample = time.time()
+        snapshot = {
+            "time": round(self._last_sample, 3),
+            "uptime_s": round(self._last_sample - self.started),
+            **process_usage(),
+            "gauges": {},
+        }
+        for name, read in self._gauges.items():
+            try:
+                snapshot["gauges"][name] = read()
+            except Exception as e:
+                logger.warning(f"Resource gauge {name} failed: {e}")
+
+        if tracemalloc.is_tracing():
+            by_subsystem = {}
+            sites = {}  # (allocating line, owner) -> [size, count]
+            # Filtering after grouping: Snapshot.filter_traces pattern-matches every one of the raw traces
+            for stat in tracemalloc.take_snapshot().statistics("traceback"):
+                frame = stat.traceback[-1]
+                if frame.filename in UNTRACKED:
+                    continue
+                name = owner(stat.traceback)
+                by_subsystem[name] = by_subsystem.get(name, 0) + stat.size
+                site = sites.setdefault((f"{frame.filename}:{frame.lineno}", name), [0, 0])
+                site[0] += stat.size
+                site[1] += stat.count
+            snapshot["traced_mb"] = round(sum(by_subsystem.values()) / MB, 2)
+            snapshot["subsystems"] = {name: round(size / MB, 2) for name, size in sorted(by_subsystem.items())}
+            top = sorted(sites.items(), key=lambda item: -item[1][0])[:config.RESOURCE_TOP_ALLOCATIONS]
+            snapshot["top"] = [{"site": site, "subsystem": name, "mb": round(size / MB, 3), "count": count}
+                               for (site, name), (size, count) in top]
+
+        snapshot["over_budget"], snapshot["shed"] = self._enforce(snapshot)
+        self._write(snapshot)
+        self.last_snapshot = snapshot
+        logger.info(f"Resources: RSS {snapshot['rss_mb']} MB, {snapshot['fds']} FDs, {snapshot['sockets']} sockets"
+                    + (f", traced {snapshot['traced_mb']} MB" if "traced_mb" in snapshot else ""))
+        return snapshot
+
+    def _enforce(self, snapshot: dict) -> tuple:
+        usage = dict(snapshot.get("subsystems", {}), rss=snapshot["rss_mb"])
+        over = [name for name, budget in self.budgets.items()
+                if usage.get(name) is not None and usage[name] > budget]
+        if snapshot["fds"] is not None and snapshot["fds"] > config.RESOURCE_FD_LIMIT:
+            logger.warning(f"{snapshot['fds']} open file descriptors ({snapshot['sockets']} sockets), "
+                           f"over {config.RESOURCE_FD_LIMIT}")
+        shed = []
+        for name in over:
+            logger.warning(f"Memory budget exceeded: {name} at {usage[name]} MB, budget {self.budgets[name]} MB")
+            if not config.SHED_ON_BUDGET:
+                continue
+            targets = self._shedders.items() if name == "rss" else [(name, self._shedders.get(name, []))]
+            for target, shedders in targets:
+                for shed_caches in shedders:
+                    try:
+                        freed = shed_caches()
+                    except Exception as e:
+                        logger.error(f"Shedding {target} caches failed: {e}")
+                        continue
+                    shed.append(target)
+                    logger.warning(f"Shed {target} caches ({freed})")
+        if shed:
+            gc.collect()
+        return over, shed
+
+    def _write(self, snapshot: dict):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write resource snapshot: {e}")
+
+
+# Diffing
+def load_snapshots(path=None) -> list:
+    with open(path or config.RESOURCE_LOG) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _site(entry: dict) -> str:
+    # One line can allocate for several owners, e.g. the trader's candle parsing
+    return f"{entry['site']} [{entry['subsystem']}]" if "subsystem" in entry else entry["site"]
+
+
+def diff(before: dict, after: dict) -> dict:
+    """
+    Change of every numeric figure between two snapshots, and of each allocation site in either's top list.
+    Sites missing from a snapshot's top list count as 0 there, so the deltas are lower bounds for small sites.
+    """
+    changes = {}
+    for key in ("rss_mb", "peak_rss_mb", "traced_mb", "fds", "sockets", "threads"):
+        if before.get(key) is not None and after.get(key) is not None:
+            changes[key] = (before[key], after[key], round(after[key] - before[key], 3))
+    for group in ("subsystems", "gauges"):
+        old, new = before.get(group, {}), after.get(group, {})
+        for name in sorted(set(old) | set(new)):
+            changes[f"{group[:-1]}:{name}"] = (old.get(name, 0), new.get(name, 0),
+                                              round(new.get(name, 0) - old.get(name, 0), 3))
+    old_sites = {_site(s): s["mb"] for s in before.get("top", [])}
+    new_sites = {_site(s): s["mb"] for s in after.get("top", [])}
+    sites = {site: round(new_sites.get(site, 0) - old_sites.get(site, 0), 3) for site in set(old_sites) | set(new_sites)}
+    changes["sites"] = sorted(sites.items(), key=lambda item: -abs(item[1]))
+    return changes
+
+
+def _stamp(snapshot: dict) -> str:
+    return datetime.fromtimestamp(snapshot["time"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource snapshots of a running bot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Latest snapshot")
+    show.add_argument("--file", default=None, help=f"Defaults to {config.RESOURCE_LOG}")
+    compare = sub.add_parser("diff", help="Growth between two snapshots (default: first and last)")
+    compare.add_argument("--file", default=None, help=f"Defaults to {config.RESOURCE_LOG}")
+    compare.add_argument("--from", dest="start", type=int, default=0, help="Snapshot index, negative from the end")
+    compare.add_argument("--to", dest="end", type=int, default=-1)
+    args = parser.parse_args()
+
+    snapshots = load_snapshots(args.file)
+    if not snapshots:
+        print("No snapshots")
+        return
+    if args.command == "show":
+        print(json.dumps(snapshots[-1], indent=2))
+        return
+
+    before, after = snapshots[args.start], snapshots[args.end]
+    hours = (after["time"] - before["time"]) / 3600
+    print(f"{_stamp(before)} -> {_stamp(after)} ({hours:.1f} h)")
+    changes = diff(before, after)
+    for key, value in changes.items():
+        if key != "sites":
+            print(f"  {key:<32}{value[0]:>12}{value[1]:>12}{value[2]:>+12}")
+    print("  Allocation sites (MB)")
+    for site, delta in changes["sites"][:config.RESOURCE_TOP_ALLOCATIONS]:
+        print(f"    {delta:>+10.3f}  {site}")
+
+
+if __name__ == "__main__":
+    main()
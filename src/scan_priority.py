@@ -0,0 +1,53 @@
+from src.config import config
+
+VOLATILITY_CANDLES = 14  # Candles averaged for the typical range
+FAR_AWAY = 10.0  # Distance (in typical ranges) assumed when a symbol has no swing level to watch
+
+
+def typical_range(candles: list, count: int = VOLATILITY_CANDLES) -> float:
+    recent = candles[-count:]
+    return sum(c["high"] - c["low"] for c in recent) / len(recent)
+
+
+def fallback_levels(candles: list, exclude_last: int = 5) -> tuple:
+    """
+    Window low and high before the last `exclude_last` candles, for strategies without `sweep_levels`.
+    """
+    settled = candles[:-exclude_last] or candles
+    return min(c["low"] for c in settled), max(c["high"] for c in settled), None
+
+
+class ScanPrioritizer:
+    """
+    Orders each scan so symbols most likely to produce a setup are evaluated first.
+
+    After a symbol is evaluated its score is updated from the candles already fetched: how many typical
+    candle ranges its last price is from the nearest swing level the sweep detector watches, and whether a
+    sweep was already detected (the lower timeframe confirmation may follow on the next scan). Volatile
+    symbols sit fewer ranges away from a given price gap, so they rank higher too. Every symbol is still
+    scanned once per cycle, so the request count is unchanged; symbols never evaluated go first.
+    """
+
+    def __init__(self, sweep_bonus: float = config.SCAN_SWEEP_BONUS):
+        self.sweep_bonus = sweep_bonus
+        self.scores = {}  # symbol -> score from its last evaluation, higher scans earlier
+
+    def order(self, symbols: list) -> list:
+        return sorted(symbols, key=lambda symbol: -self.scores.get(symbol, float("inf")))
+
+    def observe(self, symbol: str, candles: list, levels: tuple):
+        """
+        Update `symbol`'s score after an evaluation.
+
+        Args:
+            candles: The window the strategy was given, forming candle last.
+            levels: (swing_low, swing_high, swept_side) as returned by the strategy's `sweep_levels`.
+        """
+        if not candles:
+            return
+        swing_low, swing_high, swept = levels
+        price = candles[-1]["close"]
+        span = typical_range(candles) or price * 1e-4
+        distances = [abs(price - level) / span for level in (swing_low, swing_high) if level is not None]
+        distance = min(distances) if distances else FAR_AWAY
+        self.scores[symbol] = 1 / (1 + distance) + (self.sweep_bonus if swept else 0.0)
@@ -0,0 +1,49 @@
+from src.scan_priority import fallback_levels
+from src.config import config
+
+
+def scan(strategy, engine, prioritizer, symbols):
+    """
+    One pass over `symbols`, closest to a setup first. A chunk at a time is fetched and goes through the
+    strategy's first stage (one vectorised screen, or a prefilter per symbol); only symbols that pass get the
+    conditional data and the full entry check. The bot's scan loop and the synthetic benchmark both run it.
+
+    Yields:
+        list: After each chunk, the (position, symbol, side, entry_price, stop_loss, target) of its entry
+        signals. The next chunk is only fetched when the caller asks for it, so signals are always acted on
+        while their candles are fresh.
+    """
+    sweep_levels = getattr(strategy, "sweep_levels", None)
+    screen = getattr(strategy, "screen", None)
+    order = prioritizer.order(symbols)
+    for chunk_start in range(0, len(order), config.SCREEN_BATCH):
+        bundles = engine.load(order[chunk_start:chunk_start + config.SCREEN_BATCH])
+        windows = {symbol: data[engine.primary] for symbol, data in bundles.items()}
+        screened = screen(windows) if screen else None
+
+        passed = []
+        for position, (symbol, candles) in enumerate(windows.items(), chunk_start):
+            if screened is not None:
+                side, swing_low, swing_high = screened[symbol]
+                prioritizer.observe(symbol, candles, (swing_low, swing_high, side))
+                if side:
+                    passed.append((position, symbol))
+            elif strategy.prefilter(symbol, bundles[symbol]):
+                passed.append((position, symbol))
+            else:
+                prioritizer.observe(symbol, candles,
+                                    sweep_levels(symbol) if sweep_levels else fallback_levels(candles))
+        engine.complete(bundles, [symbol for _, symbol in passed])
+
+        signals = []
+        for position, symbol in passed:
+            if symbol not in bundles:
+                continue
+            candles = windows[symbol]
+            should_enter, side, entry_price, stop_loss, target = strategy.evaluate(symbol, bundles[symbol])
+            if screened is None:
+                prioritizer.observe(symbol, candles,
+                                    sweep_levels(symbol) if sweep_levels else fallback_levels(candles))
+            if should_enter:
+                signals.append((position, symbol, side, entry_price, stop_loss, target))
+        yield signals
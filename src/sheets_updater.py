@@ -1,8 +1,5 @@
-from google.oauth2.service_account import Credentials
+from src.config import config
 from src.logger import logger
-import pandas as pd
-import gspread
-from gspread.utils import ValueInputOption
 import os
 
 
@@ -11,7 +8,15 @@ def update_sheet(csv_path: str, sheet_name: str, credentials_json: str):
     Append all entries from CSV to Google Sheet in first empty row of A-K,
     then empty the CSV while preserving headers.
     """
+    if config.SIMULATED:
+        return  # replayed and synthetic trades stay in their own CSV
     try:
+        # Imported here so the bot does not pay for pandas and the Google clients until a trade closes
+        from google.oauth2.service_account import Credentials
+        from gspread.utils import ValueInputOption
+        import pandas as pd
+        import gspread
+
         # Set up authentication and open the sheet
         scopes = [
             "https://www.googleapis.com/auth/spreadsheets",
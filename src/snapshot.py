@@ -0,0 +1,64 @@
+from src.logger import logger
+from pathlib import Path
+import gzip
+import json
+import time
+import os
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: Path, trader, candle_builder):
+    """
+    Persist exchange metadata and the candle buffers so a restart only has to backfill what it missed.
+    The file is written next to the target and renamed over it, so a crash never leaves half a snapshot.
+    """
+    started = time.perf_counter()
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "exchange_info": trader._exchange_info,
+        "exchange_info_time": trader._exchange_info_time,
+        "base_interval": candle_builder.base_interval,
+        "candles": candle_builder.export(),
+    }
+    try:
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", compresslevel=1) as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        logger.debug(f"Snapshot saved to {path} in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Failed to save snapshot: {e}")
+
+
+def load_snapshot(path: Path, trader, candle_builder, max_age: float) -> bool:
+    """
+    Warm `trader` and `candle_builder` from a snapshot no older than `max_age` seconds.
+
+    Returns:
+        bool: True if the snapshot was loaded.
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    try:
+        with gzip.open(path, "rt") as f:
+            snapshot = json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to read snapshot {path}: {e}")
+        return False
+
+    age = time.time() - snapshot.get("saved_at", 0)
+    if snapshot.get("version") != SNAPSHOT_VERSION or age > max_age:
+        logger.info(f"Ignoring snapshot {path} ({age / 60:.0f} minutes old)")
+        return False
+
+    if snapshot.get("exchange_info"):
+        trader.load_exchange_info(snapshot["exchange_info"], snapshot.get("exchange_info_time"))
+    if snapshot.get("base_interval") == candle_builder.base_interval:
+        candle_builder.restore(snapshot.get("candles", {}))
+    logger.info(f"Warm start from snapshot saved {age / 60:.1f} minutes ago "
+                f"({len(snapshot.get('candles', {}))} symbols)")
+    return True
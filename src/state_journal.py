@@ -0,0 +1,164 @@
+from src.config import config
+from src.logger import logger
+from pathlib import Path
+import json
+import time
+import os
+
+# Lifecycle events and the trade status they leave behind (None removes the trade)
+EVENTS = {
+    "order_placed": "pending",
+    "order_filled": "open",
+    "order_canceled": None,
+    "position_closed": None,
+    "handed_over": None,  # now monitored by another worker
+}
+
+
+class StateJournal:
+    """
+    Append-only log of order and position lifecycle events, one JSON object per line.
+
+    Writes reach the OS immediately but are fsynced in batches; events that would leave an untracked order
+    on the exchange if lost (order placement) are fsynced right away. After `compact_every` events the
+    journal is rewritten as a single snapshot of the live trades, so replaying it on restart takes time
+    proportional to the number of open trades rather than to how long the bot has been running.
+    """
+
+    def __init__(self, path: Path,
+                 fsync_batch: int = config.JOURNAL_FSYNC_BATCH,
+                 fsync_interval: float = config.JOURNAL_FSYNC_INTERVAL,
+                 compact_every: int = config.JOURNAL_COMPACT_EVENTS):
+        self.path = Path(path)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.trades = {}  # order_id -> trade dict
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self._events_since_compaction = 0
+        self._file = None
+
+    def recover(self) -> dict:
+        """
+        Rebuild the in-memory trades from the journal and open it for appending.
+
+        Returns:
+            dict: order_id -> trade dict for every order or position that was still live.
+        """
+        self.trades = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write; everything before it is intact
+                        logger.warning(f"Skipping unreadable journal line in {self.path}")
+                        continue
+                    self._apply(entry)
+        # Start from a compacted file so a crash loop can't grow the journal
+        self.compact()
+        if self.trades:
+            logger.info(f"Recovered {len(self.trades)} live trade(s) from {self.path}")
+        return self.trades
+
+    def _apply(self, entry: dict):
+        if entry["event"] == "snapshot":
+            self.trades = {trade["order_id"]: trade for trade in entry["trades"]}
+            return
+        order_id = entry["order_id"]
+        status = EVENTS[entry["event"]]
+        if status is None:
+            self.trades.pop(order_id, None)
+            return
+        trade = self.trades.setdefault(order_id, {"order_id": order_id})
+        trade.update({k: v for k, v in entry.items() if k not in ("event", "time")})
+        trade["status"] = status
+
+    def record(self, event: str, order_id: str, sync: bool = False, **fields):
+        """
+        Append a lifecycle event and apply it to the in-memory state.
+        """
+        entry = {"event": event, "time": time.time(), "order_id": order_id, **fields}
+        self._apply(entry)
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        self._events_since_compaction += 1
+        if sync or self._unsynced >= self.fsync_batch:
+            self.sync()
+        if self._events_since_compaction >= self.compact_every:
+            self.compact()
+
+    def sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.time()
+
+    def tick(self):
+        """
+        Fsync a pending batch once it is older than the sync interval. Call this from the main loop.
+        """
+        if self._unsynced and time.time() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def compact(self):
+        """
+        Replace the journal with one snapshot event holding the live trades.
+        """
+        if self._file:
+            self._file.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            snapshot = {"event": "snapshot", "time": time.time(), "trades": list(self.trades.values())}
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a")
+        self._unsynced = 0
+        self._events_since_compaction = 0
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+def reconcile(journal: StateJournal, trader):
+    """
+    Align recovered trades with the exchange using one bulk open-orders and one bulk positions query.
+
+    Pending orders that are gone but left a position filled while we were down; pending orders that left
+    nothing were canceled or expired; open trades without a position were closed outside the bot.
+    """
+    open_orders = trader.get_open_orders()
+    positions = trader.get_positions()
+    if open_orders is None or positions is None:
+        logger.error("Could not reconcile journal with the exchange; keeping recovered state as is")
+        return
+
+    open_order_ids = {str(order["orderId"]) for order in open_orders}
+    position_symbols = {p["symbol"] for p in positions if float(p["positionAmt"]) != 0}
+
+    for order_id, trade in list(journal.trades.items()):
+        symbol = trade["symbol"]
+        if trade["status"] == "pending" and order_id not in open_order_ids:
+            if symbol in position_symbols:
+                logger.info(f"Order {order_id} for {symbol} filled while the bot was down")
+                journal.record("order_filled", order_id, entry_time=time.time())
+            else:
+                logger.info(f"Order {order_id} for {symbol} is no longer open; forgetting it")
+                journal.record("order_canceled", order_id)
+        elif trade["status"] == "open" and symbol not in position_symbols:
+            logger.warning(f"Position for {symbol} (ID: {order_id}) was closed outside the bot")
+            journal.record("position_closed", order_id)
+
+    tracked = {trade["symbol"] for trade in journal.trades.values()}
+    for symbol in position_symbols - tracked:
+        logger.warning(f"Open position on {symbol} is not tracked by the bot")
+    journal.sync()
@@ -0,0 +1,212 @@
+from bisect import bisect_left
+
+
+class SegmentTree:
+    """
+    Range extremum over a ring buffer of fixed capacity, addressed by absolute candle index.
+
+    Leaves hold (value, signed index) pairs so plain tuple comparison does the tie-breaking: with
+    `latest=True` the most recent of equal values wins, otherwise the earliest one.
+    """
+
+    def __init__(self, capacity: int, mode: str, latest: bool):
+        self.size = capacity
+        self.best = max if mode == "max" else min
+        self.sign = 1 if (mode == "max") == latest else -1
+        self.tree = [None] * (2 * capacity)
+
+    def _merge(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return self.best(a, b)
+
+    def set(self, index: int, value: float):
+        pos = index % self.size + self.size
+        self.tree[pos] = (value, self.sign * index)
+        pos //= 2
+        while pos:
+            self.tree[pos] = self._merge(self.tree[2 * pos], self.tree[2 * pos + 1])
+            pos //= 2
+
+    def _query(self, lo: int, hi: int):
+        result = None
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                result = self._merge(result, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = self._merge(result, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return result
+
+    def query(self, start: int, end: int):
+        """
+        Best (value, absolute index) over absolute indices [start, end), or None for an empty range.
+        """
+        if start >= end:
+            return None
+        lo, hi = start % self.size, (end - 1) % self.size + 1
+        if lo < hi:
+            result = self._query(lo, hi)
+        else:  # the range wraps around the ring
+            result = self._merge(self._query(lo, self.size), self._query(0, hi))
+        return result[0], self.sign * result[1]
+
+
+class IndicatorState:
+    """
+    Incrementally maintained view of one symbol/timeframe candle window for LiquiditySweepStrategy.
+
+    `sync` is called with the same window `entry_signal` receives. Candles already held are recognised by
+    timestamp, so a poll usually costs one point update for the forming candle plus one per newly closed
+    candle: O(log window) each. Range extrema (with the strategy's tie-breaking rules) are answered by
+    segment trees, and FVGs are indexed as soon as their third candle closes.
+
+    Indices taken and returned by the query methods are relative to the current window, like list indices.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.size = 1 << max(capacity - 1, 1).bit_length()
+        self.candles = [None] * self.size
+        self.first = 0    # absolute index of the oldest candle in the window
+        self.last = -1    # absolute index of the newest (forming) candle
+        self.high_latest = SegmentTree(self.size, "max", latest=True)
+        self.high_earliest = SegmentTree(self.size, "max", latest=False)
+        self.low_latest = SegmentTree(self.size, "min", latest=True)
+        self.low_earliest = SegmentTree(self.size, "min", latest=False)
+        self.close_max = SegmentTree(self.size, "max", latest=True)
+        self.close_min = SegmentTree(self.size, "min", latest=True)
+        # Absolute index of the first candle of each FVG whose three candles are closed. Bearish: first candle's
+        # high below the third's low; bullish: first candle's low above the third's high
+        self.fvg_starts = {"bearish": [], "bullish": []}
+
+    def __len__(self):
+        return self.last - self.first + 1
+
+    # Maintenance
+    def sync(self, candles: list):
+        """
+        Bring the state in line with `candles` (oldest first, forming candle last).
+        """
+        if not candles:
+            self.first, self.last = 0, -1
+            return
+        if len(candles) > self.size:
+            self.__init__(len(candles))
+        # Candles are replaced, never edited in place, so the same newest object means the same window
+        if len(candles) == len(self) and candles[-1] is self.candles[self.last % self.size] \
+                and candles[0] is self.candles[self.first % self.size]:
+            return
+        k = self._overlap(candles)
+        if k is None:
+            self._rebuild(candles)
+            return
+
+        self._set(self.last, candles[k])
+        for candle in candles[k + 1:]:
+            self.last += 1
+            self._set(self.last, candle)
+            self._index_fvg(self.last - 3)  # the previous forming candle has just closed
+        self.first = self.last - len(candles) + 1
+
+        # FVGs that start before the window are skipped by `fvgs`; drop them in bulk so this stays amortised O(1)
+        for starts in self.fvg_starts.values():
+            stale = bisect_left(starts, self.first)
+            if stale > self.size:
+                del starts[:stale]
+
+    def _overlap(self, candles: list):
+        """
+        Position in `candles` of the newest candle we hold, or None if the window can't be continued.
+        """
+        if self.last < 0:
+            return None
+        last_ts = self.candles[self.last % self.size]["timestamp"]
+        for k in range(len(candles) - 1, -1, -1):
+            if candles[k]["timestamp"] == last_ts:
+                break
+            if candles[k]["timestamp"] < last_ts:
+                return None
+        else:
+            return None
+        first = self.last - k
+        if first <= self.last - self.size or first < self.first:
+            return None
+        if self.candles[first % self.size]["timestamp"] != candles[0]["timestamp"]:
+            return None
+        return k
+
+    def _rebuild(self, candles: list):
+        self.__init__(self.size)
+        for i, candle in enumerate(candles):
+            self._set(i, candle)
+        self.first, self.last = 0, len(candles) - 1
+        for i in range(len(candles) - 3):
+            self._index_fvg(i)
+
+    def _set(self, index: int, candle: dict):
+        self.candles[index % self.size] = candle
+        self.high_latest.set(index, candle["high"])
+        self.high_earliest.set(index, candle["high"])
+        self.low_latest.set(index, candle["low"])
+        self.low_earliest.set(index, candle["low"])
+        self.close_max.set(index, candle["close"])
+        self.close_min.set(index, candle["close"])
+
+    def _index_fvg(self, i: int):
+        if i < self.first:
+            return
+        candle1 = self.candles[i % self.size]
+        candle3 = self.candles[(i + 2) % self.size]
+        if candle1["high"] < candle3["low"]:
+            self.fvg_starts["bearish"].append(i)
+        elif candle1["low"] > candle3["high"]:
+            self.fvg_starts["bullish"].append(i)
+
+    # Queries (relative indices)
+    def candle(self, index: int) -> dict:
+        return self.candles[(self.first + index) % self.size]
+
+    def _extreme(self, tree: SegmentTree, start: int, end: int, empty: float) -> tuple:
+        result = tree.query(self.first + max(start, 0), self.first + min(end, len(self)))
+        if result is None:
+            return empty, -1
+        return result[0], result[1] - self.first
+
+    def highest_high(self, start: int, end: int) -> tuple:
+        """(high, index) of the highest high in [start, end), latest occurrence on ties."""
+        return self._extreme(self.high_latest, start, end, -float("inf"))
+
+    def lowest_low(self, start: int, end: int) -> tuple:
+        """(low, index) of the lowest low in [start, end), latest occurrence on ties."""
+        return self._extreme(self.low_latest, start, end, float("inf"))
+
+    def first_highest_high(self, start: int, end: int) -> tuple:
+        """(high, index) of the highest high in [start, end), earliest occurrence on ties."""
+        return self._extreme(self.high_earliest, start, end, -float("inf"))
+
+    def first_lowest_low(self, start: int, end: int) -> tuple:
+        """(low, index) of the lowest low in [start, end), earliest occurrence on ties."""
+        return self._extreme(self.low_earliest, start, end, float("inf"))
+
+    def highest_close(self, start: int, end: int) -> float:
+        return self._extreme(self.close_max, start, end, -float("inf"))[0]
+
+    def lowest_close(self, start: int, end: int) -> float:
+        return self._extreme(self.close_min, start, end, float("inf"))[0]
+
+    def fvgs(self, fvg_type: str, start: int, end: int) -> list:
+        """
+        Start indices of `fvg_type` FVGs beginning in [start, end).
+        Only FVGs whose third candle has closed are indexed.
+        """
+        starts = self.fvg_starts[fvg_type]
+        lo = bisect_left(starts, self.first + max(start, 0))
+        hi = bisect_left(starts, self.first + end)
+        return [i - self.first for i in starts[lo:hi]]
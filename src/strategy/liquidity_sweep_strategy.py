@@ -1,14 +1,67 @@
-from src.strategy.strategy_template import StrategyInterface
-from binance.client import Client
+from src.strategy.strategy_template import StrategyInterface, DataRequirement
+from src.strategy.indicator_state import IndicatorState
+from src.candle_builder import CandleBuilder
+from src.trader import create_client
 from src.config import config
 from src.logger import logger
 
 
 class LiquiditySweepStrategy(StrategyInterface):
+    # Set by the engine to serve lower timeframe candles from the shared feed instead of a separate request
+    candle_builder = None
+
+    def __init__(self, exclude_last: int = 5, swing_spacing: int = 5, fvg_lookback: int = 50,
+                 stop_buffer: float = 0.001, reward_ratio: float = 3, key_margin: int = 10):
+        """
+        Args:
+            exclude_last: Most recent candles left out of the swing search; the sweep must happen within them.
+            swing_spacing: Minimum number of candles between the prior and the recent swing extreme.
+            fvg_lookback: How many lower timeframe candles before the key candle are searched for an FVG.
+            stop_buffer: Fraction the stop loss is placed beyond the key candle's extreme.
+            reward_ratio: Target distance as a multiple of the risk (3 -> 1:3 RR).
+            key_margin: Candles required on both sides of the lower timeframe key candle.
+        """
+        self.exclude_last = exclude_last
+        self.swing_spacing = swing_spacing
+        self.fvg_lookback = fvg_lookback
+        self.stop_buffer = stop_buffer
+        self.reward_ratio = reward_ratio
+        self.key_margin = key_margin
+        self._indicators = {}  # (symbol, timeframe) -> IndicatorState
+        self._swept = {}  # symbol -> side of the sweep found on its last entry_signal, or None
+        self._own_builders = {}  # timeframe -> CandleBuilder, used when no candle_builder is shared
+        self._exchange = None
+
     def _get_candles(self, symbol, interval, limit=100):
+        if self.candle_builder is not None:
+            return self.candle_builder.get_candles(symbol, interval, limit)
+        # No shared builder: keep a per-symbol cache per interval that is topped up with delta requests
+        builder = self._own_builders.get(interval)
+        if builder is None:
+            builder = self._own_builders[interval] = CandleBuilder(self._fetch_klines, interval)
+        builder.track(interval, limit)
+        if not builder.refresh(symbol):
+            return []
+        return builder.get_candles(symbol, interval, limit)
+
+    def shed(self) -> str:
+        """
+        Free memory: indicator state is rebuilt from the candles on the next evaluation of each symbol.
+        """
+        count = len(self._indicators)
+        self._indicators.clear()
+        for builder in self._own_builders.values():
+            builder.shed()
+        return f"{count} indicator states"
+
+    def _fetch_klines(self, symbol, interval, limit=100, start_time=None):
         try:
-            exchange = Client(config.BINANCE_API_KEY, config.BINANCE_API_SECRET, testnet=config.TESTNET)
-            klines = exchange.futures_klines(symbol=symbol, interval=interval, limit=limit)
+            if self._exchange is None:
+                self._exchange = create_client()
+            params = {"symbol": symbol, "interval": interval, "limit": limit}
+            if start_time is not None:
+                params["startTime"] = start_time
+            klines = self._exchange.futures_klines(**params)
             return [
                 {
                     "timestamp": k[0],
@@ -24,443 +77,262 @@ class LiquiditySweepStrategy(StrategyInterface):
             logger.error(f"Failed to fetch candles for {symbol}: {e}")
             return []
 
-    def _detect_fvg(self, candles: list, fvg_type: str) -> list:
-        """
-        Detect Fair Value Gaps (FVGs) in candle data
-
-        Args:
-            candles: List of candlestick data
-            fvg_type: 'bullish' or 'bearish'
-
-        Returns:
-            List of FVG dictionaries with:
-                'type': fvg_type
-                'zone': (top, bottom) price levels
-                'candle_index': index of the last candle in the FVG pattern
-        """
-        fvgs = []
-        for i in range(2, len(candles)):
-            if fvg_type == 'bullish':
-                # Bullish FVG: Middle candle high < first candle low
-                if candles[i - 1]['high'] < candles[i - 2]['low']:
-                    fvgs.append({
-                        'type': 'bullish',
-                        'zone': (candles[i - 1]['high'], candles[i - 2]['low']),
-                        'candle_index': i
-                    })
-            elif fvg_type == 'bearish':
-                # Bearish FVG: Middle candle low > first candle high
-                if candles[i - 1]['low'] > candles[i - 2]['high']:
-                    fvgs.append({
-                        'type': 'bearish',
-                        'zone': (candles[i - 2]['high'], candles[i - 1]['low']),
-                        'candle_index': i
-                    })
-        return fvgs
-
-    def _check_inverse_fvg(self, candles: list, side: str) -> tuple:
+    def detect_liquidity_sweep(self, candles: list) -> tuple:
         """
-        Check for inverse FVG pattern according to specifications
-
-        Args:
-            candles: List of candlestick data
-            side: 'LONG' or 'SHORT'
+        Detect liquidity sweep both buy-side and sell-side on a standalone window.
 
         Returns:
-            tuple: (is_valid, entry_price, stop_loss, target_price)
+            tuple: (side, swing_point, key_index), or (None, None, None) without a sweep.
         """
-        if len(candles) < 20:
-            return (False, 0, 0, 0)
-
-        # Find key candle based on trade side
-        if side == "LONG":
-            # Find lowest low candle
-            low_val = float('inf')
-            key_index = -1
-            for i, candle in enumerate(candles):
-                if candle['low'] < low_val:
-                    low_val = candle['low']
-                    key_index = i
-        else:
-            # Find the highest high candle
-            high_val = float('-inf')
-            key_index = -1
-            for i, candle in enumerate(candles):
-                if candle['high'] > high_val:
-                    high_val = candle['high']
-                    key_index = i
-
-        # Validate enough candles before and after key candle
-        if key_index < 10 or key_index > len(candles) - 10:
-            return False, 0, 0, 0
-
-        # Find FVGs before and after the key candle
-        if side == "LONG":
-            # For LONG trades: look for bearish FVG before key candle
-            bearish_fvgs = self._detect_fvg(candles[:key_index], 'bearish')
-            if not bearish_fvgs:
-                return False, 0, 0, 0
-
-            # Get the most recent bearish FVG
-            bearish_fvg = bearish_fvgs[-1]
-            fvg_top = bearish_fvg['zone'][0]
-
-            # Get OB top (high of candle before FVG)
-            ob_top_candle = candles[bearish_fvg['candle_index'] - 3]
-            ob_top = ob_top_candle['high']
-
-            # Find bullish FVG after key candle
-            bullish_fvgs = self._detect_fvg(candles[key_index:], 'bullish')
-            if not bullish_fvgs:
-                return False, 0, 0, 0
-
-            # Get the first bullish FVG after key candle
-            bullish_fvg = bullish_fvgs[0]
-            fvg_candle_index = key_index + bullish_fvg['candle_index']
-            fvg_candle = candles[fvg_candle_index]
-
-            # Check conditions
-            condition1 = any(candle['close'] > fvg_top
-                             for candle in candles[key_index:])
-            condition2 = any(candle['high'] > ob_top
-                             for candle in candles[key_index:])
-
-            if condition1 and condition2:
-                # Entry price is max of open/close of third candle in bullish FVG
-                entry_price = max(fvg_candle['open'], fvg_candle['close'])
-                stop_loss = low_val * 0.999  # Slightly below key low
-                risk = entry_price - stop_loss
-                target_price = entry_price + (3 * risk)  # 1:3 RR
-                return True, entry_price, stop_loss, target_price
-
-        else:
-            # For SHORT trades: look for bullish FVG before key candle
-            bullish_fvgs = self._detect_fvg(candles[:key_index], 'bullish')
-            if not bullish_fvgs:
-                return False, 0, 0, 0
-
-            # Get the most recent bullish FVG
-            bullish_fvg = bullish_fvgs[-1]
-            fvg_bottom = bullish_fvg['zone'][1]
-
-            # Get OB bottom (low of candle before FVG)
-            ob_bottom_candle = candles[bullish_fvg['candle_index'] - 3]
-            ob_bottom = ob_bottom_candle['low']
-
-            # Find bearish FVG after key candle
-            bearish_fvgs = self._detect_fvg(candles[key_index:], 'bearish')
-            if not bearish_fvgs:
-                return False, 0, 0, 0
-
-            # Get the first bearish FVG after key candle
-            bearish_fvg = bearish_fvgs[0]
-            fvg_candle_index = key_index + bearish_fvg['candle_index']
-            fvg_candle = candles[fvg_candle_index]
-
-            # Check conditions
-            condition1 = any(candle['close'] < fvg_bottom
-                             for candle in candles[key_index:])
-            condition2 = any(candle['low'] < ob_bottom
-                             for candle in candles[key_index:])
-
-            if condition1 and condition2:
-                # Entry price is min of open/close of third candle in bearish FVG
-                entry_price = min(fvg_candle['open'], fvg_candle['close'])
-                stop_loss = high_val * 1.001  # Slightly above key high
-                risk = stop_loss - entry_price
-                target_price = entry_price - (3 * risk)  # 1:3 RR
-                return (True, entry_price, stop_loss, target_price)
-
-        return False, 0, 0, 0
-
-    # Existing liquidity sweep detection methods remain unchanged
-    def detect_liquidity_sweep(self, candles: list) -> tuple:
+        state = IndicatorState(len(candles))
+        state.sync(candles)
+        return self.detect_sweep(state)
+
+    # Detector stages, answered from an IndicatorState per symbol and timeframe instead of rescanning the window
+    def _indicator_state(self, symbol: str, timeframe: str, candles: list) -> IndicatorState:
+        state = self._indicators.get((symbol, timeframe))
+        if state is None:
+            state = self._indicators[(symbol, timeframe)] = IndicatorState(len(candles))
+        state.sync(candles)
+        return state
+
+    @staticmethod
+    def _range_extreme(query, n: int, start: int, end: int) -> float:
         """
-        Detect liquidity sweep both buy-side and sell-side
+        Value of `query` over range(start, end) as list indexing would see it, so a start of -1 (no prior
+        swing found) also covers the last candle.
         """
-        n = len(candles)
-        if n < 15:  # Need sufficient data for reliable detection
-            return None, None, None
+        if start >= 0:
+            return query(start, end)[0]
+        if end <= 0:
+            return query(n + start, n + end)[0]
+        return query(n + start, n)[0], query(0, end)[0]
 
-        # Try to detect sell-side sweep for long positions
-        sweep_type, swing_point, key_index = self._detect_sell_side_sweep(candles)
-        if sweep_type:
-            return sweep_type, swing_point, key_index
+    def _swing_low(self, state: IndicatorState, start: int, end: int) -> float:
+        value = self._range_extreme(state.lowest_low, len(state), start, end)
+        return min(value) if isinstance(value, tuple) else value
 
-        # Try to detect buy-side sweep for short positions
-        sweep_type, swing_point, key_index = self._detect_buy_side_sweep(candles)
-        if sweep_type:
-            return sweep_type, swing_point, key_index
+    def _swing_high(self, state: IndicatorState, start: int, end: int) -> float:
+        value = self._range_extreme(state.highest_high, len(state), start, end)
+        return max(value) if isinstance(value, tuple) else value
 
-        return None, None, None
+    def _sweep_window_start(self, n: int) -> int:
+        # Same candles as candles[-exclude_last:]
+        return max(0, n - self.exclude_last) if self.exclude_last > 0 else 0
 
-    def _find_highest_high(self, candles: list, start: int, end: int) -> tuple:
-        """
-        Find the highest high in range with latest occurrence
-        Returns: (high_value, index)
+    def _sell_side_level(self, state: IndicatorState, n: int) -> tuple:
         """
-        highest_high = -float('inf')
-        highest_index = -1
-        for i in range(start, end):
-            if candles[i]['high'] > highest_high:
-                highest_high = candles[i]['high']
-                highest_index = i
-            elif candles[i]['high'] == highest_high and i > highest_index:
-                highest_index = i
-        return highest_high, highest_index
-
-    def _find_lowest_low(self, candles: list, start: int, end: int) -> tuple:
+        (swing low between the recent and prior highs, recent high index), or (None, None) without a valid pair.
         """
-        Find the lowest low in range with latest occurrence
-        Returns: (low_value, index)
-        """
-        lowest_low = float('inf')
-        lowest_index = -1
-        for i in range(start, end):
-            if candles[i]['low'] < lowest_low:
-                lowest_low = candles[i]['low']
-                lowest_index = i
-            elif candles[i]['low'] == lowest_low and i > lowest_index:
-                lowest_index = i
-        return lowest_low, lowest_index
-
-    def _detect_sell_side_sweep(self, candles: list) -> tuple:
-        """Detect sell-side liquidity sweep for long positions"""
-        n = len(candles)
-        exclude_last = 5
-        search_end = n - exclude_last
-
-        # Find recent highest high excluding last 5 candles
-        recent_high, recent_high_idx = self._find_highest_high(candles, 0, search_end)
-
-        # Find prior highest high with at least 5 candles in between
-        prior_search_end = max(0, recent_high_idx - 5)
-        prior_high, prior_high_idx = self._find_highest_high(candles, 0, prior_search_end)
-
-        # Validate we have at least 5 candles between highs
-        if recent_high_idx - prior_high_idx < 5:
-            return None, None, None
-
-        # Find swing low between the two highs
+        recent_high, recent_high_idx = state.highest_high(0, n - self.exclude_last)
+        prior_high, prior_high_idx = state.highest_high(0, max(0, recent_high_idx - self.swing_spacing))
+        if recent_high_idx - prior_high_idx < self.swing_spacing:
+            return None, None
         start_idx = min(prior_high_idx, recent_high_idx)
         end_idx = max(prior_high_idx, recent_high_idx)
-        swing_low, _ = self._find_lowest_low(candles, start_idx, end_idx + 1)
+        return self._swing_low(state, start_idx, end_idx + 1), recent_high_idx
 
-        # Check sweep and reversal conditions
-        swept = any(candle['low'] < swing_low for candle in candles[-5:])
-        reversed = candles[-1]['close'] > swing_low
-
-        if swept and reversed:
-            return "LONG", swing_low, recent_high_idx
-
-        return None, None, None
-
-    def _detect_buy_side_sweep(self, candles: list) -> tuple:
-        """Detect buy-side liquidity sweep (for short positions)"""
-        n = len(candles)
-        exclude_last = 5
-        search_end = n - exclude_last
-
-        # Find recent lowest low excluding last 5 candles
-        recent_low, recent_low_idx = self._find_lowest_low(candles, 0, search_end)
-
-        # Find prior lowest low with at least 5 candles in between
-        prior_search_end = max(0, recent_low_idx - 5)
-        prior_low, prior_low_idx = self._find_lowest_low(candles, 0, prior_search_end)
-
-        # Validate we have at least 5 candles between lows
-        if recent_low_idx - prior_low_idx < 5:
-            return None, None, None
-
-        # Find swing high between the two lows
+    def _buy_side_level(self, state: IndicatorState, n: int) -> tuple:
+        """
+        (swing high between the recent and prior lows, recent low index), or (None, None) without a valid pair.
+        """
+        recent_low, recent_low_idx = state.lowest_low(0, n - self.exclude_last)
+        prior_low, prior_low_idx = state.lowest_low(0, max(0, recent_low_idx - self.swing_spacing))
+        if recent_low_idx - prior_low_idx < self.swing_spacing:
+            return None, None
         start_idx = min(prior_low_idx, recent_low_idx)
         end_idx = max(prior_low_idx, recent_low_idx)
-        swing_high, _ = self._find_highest_high(candles, start_idx, end_idx + 1)
+        return self._swing_high(state, start_idx, end_idx + 1), recent_low_idx
 
-        # Check sweep and reversal conditions
-        swept = any(candle['high'] > swing_high for candle in candles[-5:])
-        reversed = candles[-1]['close'] < swing_high
+    def detect_sweep(self, state: IndicatorState) -> tuple:
+        n = len(state)
+        if n < 15:
+            return None, None, None
+
+        # Sell-side sweep (LONG)
+        swing_low, recent_high_idx = self._sell_side_level(state, n)
+        if swing_low is not None:
+            swept = state.lowest_low(self._sweep_window_start(n), n)[0] < swing_low
+            if swept and state.candle(n - 1)['close'] > swing_low:
+                return "LONG", swing_low, recent_high_idx
 
-        if swept and reversed:
-            return "SHORT", swing_high, recent_low_idx
+        # Buy-side sweep (SHORT)
+        swing_high, recent_low_idx = self._buy_side_level(state, n)
+        if swing_high is not None:
+            swept = state.highest_high(self._sweep_window_start(n), n)[0] > swing_high
+            if swept and state.candle(n - 1)['close'] < swing_high:
+                return "SHORT", swing_high, recent_low_idx
 
         return None, None, None
 
-    def _find_fvg(self, candles: list, start_idx: int, end_idx: int, fvg_type: str) -> list:
+    def sweep_levels(self, symbol) -> tuple:
         """
-        Find Fair Value Gaps (FVGs) in candle data
-        Args:
-            candles: List of candles
-            start_idx: Start index for search
-            end_idx: End index for search
-            fvg_type: 'bearish' or 'bullish'
+        Levels the sweep detector watched on the last `entry_signal` for `symbol`, for scan prioritisation.
+
         Returns:
-            List of FVG dictionaries with keys:
-                'start_index': Index of first candle in FVG
-                'zone': (top_price, bottom_price) of FVG zone
-                'fvg_top': Low of first candle (for bearish) or high of first candle (for bullish)
-                'ob_top': High of candle before FVG (for bearish) or low of candle before FVG (for bullish)
+            tuple: (swing_low, swing_high, swept_side); a level is None when no valid swing pair exists and
+            swept_side is the side of the sweep detected, or None.
         """
-        fvgs = []
-        for i in range(start_idx, end_idx - 2):
-            candle1 = candles[i]
-            candle2 = candles[i + 1]
-            candle3 = candles[i + 2]
-
-            if fvg_type == 'bearish':
-                # Bearish FVG: High of candle1 < Low of candle3
-                if candle1['high'] < candle3['low']:
-                    # Get OB top (high of candle before FVG)
-                    ob_top = candles[i - 1]['high'] if i > 0 else None
-                    fvgs.append({
-                        'start_index': i,
-                        'zone': (candle1['high'], candle3['low']),
-                        'fvg_top': candle1['low'],  # Low of first candle
-                        'ob_top': ob_top  # High of candle before FVG
-                    })
-
-            elif fvg_type == 'bullish':
-                # Bullish FVG: Low of candle1 > High of candle3
-                if candle1['low'] > candle3['high']:
-                    # Get OB bottom (low of candle before FVG)
-                    ob_bottom = candles[i - 1]['low'] if i > 0 else None
-                    fvgs.append({
-                        'start_index': i,
-                        'zone': (candle3['high'], candle1['low']),
-                        'fvg_bottom': candle1['high'],  # High of first candle
-                        'ob_bottom': ob_bottom  # Low of candle before FVG
-                    })
-        return fvgs
-
-    def _verify_inverse_fvg(self, candles: list, lowest_low_index: int, order_type: str) -> tuple:
+        state = self._indicators.get((symbol, config.TIMEFRAME))
+        if state is None or len(state) < 15:
+            return None, None, None
+        n = len(state)
+        return self._sell_side_level(state, n)[0], self._buy_side_level(state, n)[0], self._swept.get(symbol)
+
+    def _confirm_entry(self, state: IndicatorState, side: str) -> tuple:
         """
-        Verify inverse FVG conditions
+        Lower timeframe stage: find the key candle and verify the inverse FVG around it.
+
         Returns:
             tuple: (is_valid, entry_price, stop_loss, target_price)
         """
-        n = len(candles)
-        # 1. Find bearish FVG before the lowest low (for long) or bullish FVG before the highest high (for short)
-        fvg_before = self._find_fvg(
-            candles,
-            max(0, lowest_low_index - 50),  # Search up to 50 candles before
-            lowest_low_index - 2,  # End before the lowest low
-            'bearish' if order_type == 'LONG' else 'bullish'
-        )
+        return self.apply_entry_setup(self.entry_setup(state, side), side)
 
-        if not fvg_before:
-            return False, 0, 0, 0
+    @staticmethod
+    def entry_setup(state: IndicatorState, side: str) -> tuple:
+        """
+        The part of the lower timeframe stage that no parameter affects: the key candle, the last FVG that
+        completes before it, the first FVG from it on, and whether price violated the first one since.
+        `apply_entry_setup` finishes the stage with this strategy's parameters, so a setup can be shared by
+        every parameter combination.
 
-        # Use the most recent FVG before the low point
-        fvg_before = fvg_before[-1]
+        Returns:
+            tuple: (candles, key_index, index of the FVG before, entry_price, key candle extreme), or None
+            when no parameters could make it valid.
+        """
+        n = len(state)
+        if n < 20:
+            return None
 
-        # 2. Find FVG after the low point
-        fvg_after = self._find_fvg(
-            candles,
-            lowest_low_index,
-            n - 2,
-            'bullish' if order_type == 'LONG' else 'bearish'
-        )
+        if side == "LONG":
+            _, key_index = state.first_lowest_low(0, n)
+        else:
+            _, key_index = state.first_highest_high(0, n)
 
+        # Last FVG that completes before the key candle, and the first one from the key candle on
+        fvg_before = state.fvgs('bearish' if side == 'LONG' else 'bullish', 0, key_index - 4)
+        if not fvg_before:
+            return None
+        fvg_after = state.fvgs('bullish' if side == 'LONG' else 'bearish', key_index, n - 4)
         if not fvg_after:
-            return False, 0, 0, 0
-
-        # Use the first FVG after the low point
-        fvg_after = fvg_after[0]
-
-        # 3. Check violation conditions
-        violation_condition1 = False
-        violation_condition2 = False
+            return None
 
-        # Check candles after the low point
-        for i in range(lowest_low_index + 1, n):
-            candle = candles[i]
+        before_index = fvg_before[-1]
+        first_candle = state.candle(before_index)
+        ob_candle = state.candle(before_index - 1) if before_index > 0 else None
 
-            if order_type == 'LONG':
-                # Check close above fvg_top (low of first candle in bearish FVG)
-                if candle['close'] > fvg_before['fvg_top']:
-                    violation_condition1 = True
-
-                # Check high above ob_top (high of candle before bearish FVG)
-                if fvg_before['ob_top'] is not None and candle['high'] > fvg_before['ob_top']:
-                    violation_condition2 = True
-
-            else:  # SHORT
-                # Check close below fvg_bottom (high of first candle in bullish FVG)
-                if candle['close'] < fvg_before['fvg_bottom']:
-                    violation_condition1 = True
+        # Violation flags over the candles after the key candle
+        if side == 'LONG':
+            violation_condition1 = state.highest_close(key_index + 1, n) > first_candle['low']
+            violation_condition2 = ob_candle is not None and \
+                state.highest_high(key_index + 1, n)[0] > ob_candle['high']
+        else:
+            violation_condition1 = state.lowest_close(key_index + 1, n) < first_candle['high']
+            violation_condition2 = ob_candle is not None and \
+                state.lowest_low(key_index + 1, n)[0] < ob_candle['low']
+        if not (violation_condition1 and violation_condition2):
+            return None
 
-                # Check low below ob_bottom (low of candle before bullish FVG)
-                if fvg_before['ob_bottom'] is not None and candle['low'] < fvg_before['ob_bottom']:
-                    violation_condition2 = True
+        third_candle = state.candle(fvg_after[0] + 2)
+        key_candle = state.candle(key_index)
+        return (n, key_index, before_index, max(third_candle['open'], third_candle['close']),
+                key_candle['low'] if side == 'LONG' else key_candle['high'])
 
-            if violation_condition1 and violation_condition2:
-                break
+    def apply_entry_setup(self, setup: tuple, side: str) -> tuple:
+        """
+        Finish the lower timeframe stage from an `entry_setup`: key margins, FVG lookback, stop and target.
 
-        if not (violation_condition1 and violation_condition2):
+        Returns:
+            tuple: (is_valid, entry_price, stop_loss, target_price)
+        """
+        if setup is None:
+            return False, 0, 0, 0
+        n, key_index, before_index, entry_price, key_extreme = setup
+        if key_index < self.key_margin or n - key_index < self.key_margin:
+            return False, 0, 0, 0
+        # The FVG before the key candle must start within fvg_lookback of it
+        if before_index < key_index - self.fvg_lookback:
             return False, 0, 0, 0
 
-        # 4. Calculate entry price (max of open/close for third candle in FVG after)
-        third_candle_idx = fvg_after['start_index'] + 2
-        third_candle = candles[third_candle_idx]
-        entry_price = max(third_candle['open'], third_candle['close'])
-
-        # 5. Calculate risk management (1:3 RR)
-        if order_type == 'LONG':
-            stop_loss = candles[lowest_low_index]['low'] * 0.999  # Slightly below lowest low
+        if side == 'LONG':
+            stop_loss = key_extreme * (1 - self.stop_buffer)
             risk = entry_price - stop_loss
-            target_price = entry_price + (3 * risk)
-        else:  # SHORT
-            stop_loss = candles[lowest_low_index]['high'] * 1.001  # Slightly above highest high
+            target_price = entry_price + (self.reward_ratio * risk)
+        else:
+            stop_loss = key_extreme * (1 + self.stop_buffer)
             risk = stop_loss - entry_price
-            target_price = entry_price - (3 * risk)
-
+            target_price = entry_price - (self.reward_ratio * risk)
         return True, entry_price, stop_loss, target_price
 
+    def screen(self, windows: dict) -> dict:
+        """
+        Run the sweep detector over many symbols' TIMEFRAME windows in one vectorised pass, so only
+        symbols with a sweep need `entry_signal` (and its lower timeframe request).
+
+        Args:
+            windows: symbol -> candle window, as `entry_signal` would receive it.
+
+        Returns:
+            dict: symbol -> (side, swing_low, swing_high), side being "LONG"/"SHORT" or None exactly as
+            `detect_liquidity_sweep` decides and the levels as in `sweep_levels`.
+        """
+        import numpy as np
+        from src.strategy.sweep_screen import screen_sweeps, LONG, SHORT
+
+        by_length = {}
+        for symbol, candles in windows.items():
+            by_length.setdefault(len(candles), []).append(symbol)
+
+        results = {}
+        for n, symbols in by_length.items():
+            size = len(symbols) * n
+            highs, lows, closes = (
+                np.fromiter((c[key] for symbol in symbols for c in windows[symbol]), float, size).reshape(-1, n)
+                for key in ('high', 'low', 'close')
+            )
+            sides, swing_lows, swing_highs = screen_sweeps(highs, lows, closes, self.exclude_last, self.swing_spacing)
+            for symbol, side, swing_low, swing_high in zip(symbols, sides.tolist(), swing_lows.tolist(),
+                                                           swing_highs.tolist()):
+                side = "LONG" if side == LONG else "SHORT" if side == SHORT else None
+                self._swept[symbol] = side
+                results[symbol] = (side,
+                                   None if swing_low != swing_low else swing_low,     # nan -> None
+                                   None if swing_high != swing_high else swing_high)
+        return results
+
+    def data_requirements(self) -> list:
+        # Lower timeframe candles are only needed once a sweep has been found
+        return [
+            DataRequirement(config.TIMEFRAME, config.CANDLE_LIMIT),
+            DataRequirement(config.LOWER_TIMEFRAME, config.LOWER_CANDLE_LIMIT, conditional=True),
+        ]
+
+    def prefilter(self, symbol, data: dict) -> bool:
+        state = self._indicator_state(symbol, config.TIMEFRAME, data[config.TIMEFRAME])
+        side, _, _ = self.detect_sweep(state)
+        self._swept[symbol] = side
+        return side is not None
+
     def entry_signal(self, symbol, candles: list) -> tuple:
+        return self.evaluate(symbol, {config.TIMEFRAME: candles})
+
+    def evaluate(self, symbol, data: dict) -> tuple:
         # Step 1: Detect liquidity sweep
-        side, swing_point, key_index = self.detect_liquidity_sweep(candles)
+        state = self._indicator_state(symbol, config.TIMEFRAME, data[config.TIMEFRAME])
+        side, swing_point, key_index = self.detect_sweep(state)
+        self._swept[symbol] = side
 
         if not side:
             return False, "", 0, 0, 0
 
-        # Step 2: Switch to lower timeframe
-        ltf_candles = self._get_candles(
-            symbol,
-            config.LOWER_TIMEFRAME,
-            config.LOWER_CANDLE_LIMIT
-        )
-
-        if len(ltf_candles) < 20:  # Need at least 20 candles
-            return False, "", 0, 0, 0
-
-        # Step 3: Find lowest low (for LONG) or highest high (for SHORT)
-        if side == "LONG":
-            # Find lowest low candle index
-            lowest_low = float('inf')
-            lowest_low_index = -1
-            for i, candle in enumerate(ltf_candles):
-                if candle['low'] < lowest_low:
-                    lowest_low = candle['low']
-                    lowest_low_index = i
-        else:  # SHORT
-            # Find highest high candle index
-            highest_high = -float('inf')
-            lowest_low_index = -1  # Actually will be highest high index
-            for i, candle in enumerate(ltf_candles):
-                if candle['high'] > highest_high:
-                    highest_high = candle['high']
-                    lowest_low_index = i
-
-        # Step 4: Verify we have enough candles around the key point
-        if lowest_low_index < 10 or len(ltf_candles) - lowest_low_index < 10:
-            return False, "", 0, 0, 0
+        # Step 2: Switch to lower timeframe, fetched here when the engine didn't deliver it
+        ltf_candles = data.get(config.LOWER_TIMEFRAME)
+        if ltf_candles is None:
+            ltf_candles = self._get_candles(symbol, config.LOWER_TIMEFRAME, config.LOWER_CANDLE_LIMIT)
 
-        # Step 5: Verify inverse FVG conditions
-        valid, entry_price, stop_loss, target_price = self._verify_inverse_fvg(
-            ltf_candles,
-            lowest_low_index,
-            side
-        )
+        # Steps 3-5: Key candle and inverse FVG on the lower timeframe
+        ltf_state = self._indicator_state(symbol, config.LOWER_TIMEFRAME, ltf_candles)
+        valid, entry_price, stop_loss, target_price = self._confirm_entry(ltf_state, side)
 
         if valid:
             return True, side, entry_price, stop_loss, target_price
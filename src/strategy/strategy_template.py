@@ -1,11 +1,66 @@
 from abc import ABC, abstractmethod
+from src.config import config
+
+
+class DataRequirement:
+    """
+    Candles a strategy needs for each symbol it evaluates: `limit` candles of `timeframe`.
+
+    A conditional requirement is only fetched for symbols that pass the strategy's first stage
+    (`screen` / `prefilter`), so data that is expensive to get is never requested for symbols the cheap
+    checks already ruled out.
+    """
+
+    def __init__(self, timeframe: str, limit: int, conditional: bool = False):
+        self.timeframe = timeframe
+        self.limit = limit
+        self.conditional = conditional
+
+    def __repr__(self):
+        return f"DataRequirement({self.timeframe!r}, {self.limit}{', conditional' if self.conditional else ''})"
 
 
 class StrategyInterface(ABC):
     """
     All strategies must inherit from this interface and implement these methods.
+
+    The engine evaluates each symbol in two stages. It first delivers the unconditional requirements and
+    calls `prefilter` (or the batch `screen`, when a strategy defines one); only for symbols that pass does
+    it fetch the conditional requirements and call `evaluate` with the full data bundle.
     """
 
+    def data_requirements(self) -> list:
+        """
+        Candles the engine should fetch, cache and deliver for each symbol. The first requirement is the
+        primary timeframe, whose candles `entry_signal` receives.
+
+        Returns:
+            list: DataRequirement objects.
+        """
+        return [DataRequirement(config.TIMEFRAME, config.CANDLE_LIMIT)]
+
+    def prefilter(self, symbol, data: dict) -> bool:
+        """
+        First stage: a cheap check on the unconditional requirements only.
+
+        Args:
+            symbol (str): Symbol of the trade pair.
+            data (dict): timeframe -> list of candlestick dictionaries.
+
+        Returns:
+            bool: False skips the symbol before any conditional data is requested.
+        """
+        return True
+
+    def evaluate(self, symbol, data: dict) -> tuple[bool, str, float, float, float]:
+        """
+        Second stage: the full entry check, with every requirement's candles in `data`.
+
+        Returns:
+            tuple: Same as `entry_signal`.
+        """
+        return self.entry_signal(symbol, data[self.data_requirements()[0].timeframe])
+
     @abstractmethod
     def entry_signal(self, symbol, candles: list) -> tuple[bool, str, float, float, float]:
         """
@@ -34,4 +89,4 @@ class StrategyInterface(ABC):
         Returns:
             bool: True if exit conditions are met, False otherwise.
         """
-        pass
\ No newline at end of file
+        pass
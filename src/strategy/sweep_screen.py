@@ -0,0 +1,76 @@
+import numpy as np
+
+LONG, SHORT = 1, -1
+
+
+def _last_extreme(values: np.ndarray, end: np.ndarray, mode: str) -> tuple:
+    """
+    Per row, (value, index) of the extreme of values[row, :end[row]], latest occurrence on ties, like
+    `IndicatorState.highest_high` / `lowest_low`. Rows with an empty range get (-inf/inf, -1).
+    """
+    rows, n = values.shape
+    fill = -np.inf if mode == "max" else np.inf
+    masked = np.where(np.arange(n)[None, :] < end[:, None], values, fill)
+    reverse = masked[:, ::-1]
+    pick = reverse.argmax(axis=1) if mode == "max" else reverse.argmin(axis=1)
+    index = n - 1 - pick
+    value = masked[np.arange(rows), index]
+    empty = end <= 0
+    return np.where(empty, fill, value), np.where(empty, -1, index)
+
+
+def _range_extreme(values: np.ndarray, start: np.ndarray, end: np.ndarray, mode: str) -> np.ndarray:
+    """
+    Per row, extreme of values[row, i] for i in range(start, end) with Python indexing, so a start of -1
+    (no prior swing found) also takes in the last column.
+    """
+    n = values.shape[1]
+    cols = np.arange(n)[None, :]
+    mask = (cols >= start[:, None]) & (cols < end[:, None])
+    mask[:, n - 1] |= start < 0
+    fill = -np.inf if mode == "max" else np.inf
+    masked = np.where(mask, values, fill)
+    return masked.max(axis=1) if mode == "max" else masked.min(axis=1)
+
+
+def screen_sweeps(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                  exclude_last: int, swing_spacing: int) -> tuple:
+    """
+    `detect_liquidity_sweep` for every row of equally long candle windows (symbols x candles) at once.
+
+    Returns:
+        tuple: (side, swing_low, swing_high) arrays. side is LONG, SHORT or 0 exactly as the per-symbol
+        detector would decide; swing_low / swing_high are the levels it compares against (nan where the
+        highs or lows don't form a valid swing pair).
+    """
+    rows, n = highs.shape
+    side = np.zeros(rows, dtype=np.int8)
+    swing_low = np.full(rows, np.nan)
+    swing_high = np.full(rows, np.nan)
+    if n < 15 or rows == 0:
+        return side, swing_low, swing_high
+
+    search_end = np.full(rows, n - exclude_last, dtype=np.int64)
+    window_start = max(0, n - exclude_last) if exclude_last > 0 else 0  # candles[-exclude_last:]
+
+    # Sell side: swing low between the recent and prior highest highs
+    _, recent = _last_extreme(highs, search_end, "max")
+    _, prior = _last_extreme(highs, np.maximum(0, recent - swing_spacing), "max")
+    valid = recent - prior >= swing_spacing
+    level = _range_extreme(lows, np.minimum(prior, recent), np.maximum(prior, recent) + 1, "min")
+    swing_low[valid] = level[valid]
+    swept = lows[:, window_start:].min(axis=1) < level
+    long = valid & swept & (closes[:, -1] > level)
+
+    # Buy side: swing high between the recent and prior lowest lows
+    _, recent = _last_extreme(lows, search_end, "min")
+    _, prior = _last_extreme(lows, np.maximum(0, recent - swing_spacing), "min")
+    valid = recent - prior >= swing_spacing
+    level = _range_extreme(highs, np.minimum(prior, recent), np.maximum(prior, recent) + 1, "max")
+    swing_high[valid] = level[valid]
+    swept = highs[:, window_start:].max(axis=1) > level
+    short = valid & swept & (closes[:, -1] < level)
+
+    side[short] = SHORT
+    side[long] = LONG  # the sell side is checked first
+    return side, swing_low, swing_high
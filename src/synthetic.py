@@ -0,0 +1,595 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.candle_builder import CandleBuilder, interval_ms, bucket_start
+from urllib.parse import urlparse, parse_qsl
+from src.scan_priority import ScanPrioritizer
+from src.data_engine import DataEngine
+from src.scanner import scan
+from src.config import config
+from src.logger import logger
+from decimal import Decimal
+import numpy as np
+import threading
+import argparse
+import math
+import json
+import time
+
+# Candles of the planted lower timeframe confirmation, i.e. the last LOWER_CANDLE_LIMIT candles at defaults
+PATTERN_CANDLES = 60
+# Lower timeframe confirmation of a LONG setup as (open, high, low, close) in units above/below the anchor
+# price; candles not listed are filled in around the path. The 1h swing low sits at -10 and the recent high
+# at +20. FVG types are named as the detector names them: "bearish" is candle1.high < candle3.low.
+PATTERN = {
+    4: (-3.9, -3.5, -4.2, -3.7),     # first candle of the bearish FVG before the key candle
+    5: (-3.7, -1.9, -3.9, -2.0),
+    6: (-2.0, -1.5, -2.1, -1.7),     # its low clears candle 4's high
+    30: (-10.0, -9.8, -13.0, -11.0),  # key candle: sweeps the swing low by 3 units
+    45: (1.0, 1.4, 0.9, 1.2),        # first candle of the bullish FVG after the key candle
+    46: (1.2, 1.3, -1.1, -1.0),
+    47: (-1.0, -0.8, -1.4, -1.2),    # entry candle: max(open, close) is the entry price
+}
+PATTERN_CLOSES = [(0, -4.0), (3, -3.9), (7, -2.06), (29, -10.0), (31, -11.0), (44, 1.0), (48, -1.0), (59, -1.0)]
+SWING_LOW, PRIOR_HIGH, RECENT_HIGH = -10.0, 10.0, 20.0
+
+
+class RandomWalk:
+    """
+    Log-normal random walk with a constant volatility per base candle.
+    """
+
+    def __init__(self, vol: float = 0.002):
+        self.vol = vol
+
+    def returns(self, rng, symbols: int, n: int) -> tuple:
+        """
+        (log returns, volatility) per symbol and candle.
+        """
+        vols = np.full((symbols, n), self.vol)
+        return rng.standard_normal((symbols, n)) * vols, vols
+
+
+class RegimeSwitching:
+    """
+    Random walk whose drift and volatility follow a Markov chain of regimes: calm, trending up, trending down
+    and volatile. Each candle a symbol leaves its regime with probability `switch`.
+    """
+
+    REGIMES = [(0.0, 0.001), (0.0004, 0.002), (-0.0004, 0.002), (0.0, 0.005)]  # (drift, vol) per candle
+
+    def __init__(self, switch: float = 0.01):
+        self.switch = switch
+        self.state = None  # current regime per symbol, carried across calls
+
+    def returns(self, rng, symbols: int, n: int) -> tuple:
+        if self.state is None or len(self.state) != symbols:
+            self.state = rng.integers(len(self.REGIMES), size=symbols)
+        drift, vol = np.array(self.REGIMES).T
+        switches = rng.random((symbols, n)) < self.switch
+        draws = rng.integers(len(self.REGIMES), size=(symbols, n))
+        regimes = np.empty((symbols, n), dtype=np.int64)
+        state = self.state
+        for i in range(n):
+            state = np.where(switches[:, i], draws[:, i], state)
+            regimes[:, i] = state
+        self.state = state
+        return drift[regimes] + rng.standard_normal((symbols, n)) * vol[regimes], vol[regimes]
+
+
+MODELS = {"random_walk": RandomWalk, "regime": RegimeSwitching}
+
+
+def bars_from_returns(rng, start_prices: np.ndarray, returns: np.ndarray, vols: np.ndarray) -> np.ndarray:
+    """
+    OHLCV bars (symbols x candles x [open, high, low, close, volume]) following `returns` from `start_prices`.
+    """
+    closes = start_prices[:, None] * np.exp(np.cumsum(returns, axis=1))
+    opens = np.concatenate([start_prices[:, None], closes[:, :-1]], axis=1)
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.standard_normal(returns.shape)) * vols / 2)
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.standard_normal(returns.shape)) * vols / 2)
+    volumes = rng.lognormal(3, 1, returns.shape)
+    return np.stack([opens, highs, lows, closes, volumes], axis=2)
+
+
+def _wick(rng, size) -> np.ndarray:
+    # Bounded so noise can never reach the planted levels
+    return 0.1 + 0.3 * np.minimum(np.abs(rng.standard_normal(size)), 2)
+
+
+def _units_to_bars(rng, opens, closes, fixed: dict) -> np.ndarray:
+    bars = np.empty((len(closes), 4))
+    bars[:, 0], bars[:, 3] = opens, closes
+    bars[:, 1] = np.maximum(opens, closes) + _wick(rng, len(closes))
+    bars[:, 2] = np.minimum(opens, closes) - _wick(rng, len(closes))
+    for index, ohlc in fixed.items():
+        bars[index] = ohlc
+    return bars
+
+
+def plant_setup(rng, price: float, side: str, window: int, unit: float = 0.003, noise: float = 0.5) -> tuple:
+    """
+    The last `window` base candles of a symbol that ends in a complete liquidity sweep + inverse FVG setup.
+
+    In units of `unit` x `price`, the higher timeframe rises to a prior high (+10), dips to the swing low
+    (-10), makes the recent high (+20) and drifts back to -4. The final PATTERN_CANDLES candles then sweep the
+    swing low and confirm on the lower timeframe as in PATTERN. The structure carries random-walk noise of up
+    to `noise` units and random wicks, both too small to move the levels the detector looks at. SHORT setups
+    are the mirror image.
+
+    Returns:
+        tuple: (bars: window x [open, high, low, close, volume], label) where label has the side, the swing
+        level, the expected entry price and key_index, the key candle's position in the window.
+    """
+    structure = window - PATTERN_CANDLES
+    anchors = [0, round(structure * 10 / 39), round(structure * 20 / 39), round(structure * 32 / 39), structure]
+    path = np.interp(np.arange(1, structure + 1), anchors, [0.0, PRIOR_HIGH, SWING_LOW, RECENT_HIGH, -4.0])
+    walk = np.cumsum(rng.standard_normal(structure))
+    bridge = walk - np.linspace(0, walk[-1], structure)  # pinned to zero at both ends
+    path += bridge / (np.abs(bridge).max() or 1) * noise
+    opens = np.concatenate([[0.0], path[:-1]])
+    structure_bars = _units_to_bars(rng, opens, path, {})
+
+    points, values = zip(*PATTERN_CLOSES)
+    closes = np.interp(np.arange(PATTERN_CANDLES), points, values)
+    closes[48:] += rng.uniform(-0.3, 0.3, PATTERN_CANDLES - 48)
+    pattern_opens = np.concatenate([[path[-1]], closes[:-1]])
+    pattern_bars = _units_to_bars(rng, pattern_opens, closes, PATTERN)
+    for index in PATTERN:  # keep the path continuous around the fixed candles
+        if index + 1 < PATTERN_CANDLES and index + 1 not in PATTERN:
+            pattern_bars[index + 1, 0] = pattern_bars[index, 3]
+            pattern_bars[index + 1, 1] = max(pattern_bars[index + 1, 1], pattern_bars[index, 3])
+            pattern_bars[index + 1, 2] = min(pattern_bars[index + 1, 2], pattern_bars[index, 3])
+
+    units = np.concatenate([structure_bars, pattern_bars])
+    sign = 1 if side == "LONG" else -1
+    bars = np.empty((window, 5))
+    bars[:, 0] = price * (1 + sign * units[:, 0] * unit)
+    bars[:, 3] = price * (1 + sign * units[:, 3] * unit)
+    # Mirroring swaps which unit column is the high
+    bars[:, 1] = price * (1 + sign * (units[:, 1] if sign > 0 else units[:, 2]) * unit)
+    bars[:, 2] = price * (1 + sign * (units[:, 2] if sign > 0 else units[:, 1]) * unit)
+    bars[:, 4] = rng.lognormal(3, 1, window)
+
+    entry_units = max(PATTERN[47][0], PATTERN[47][3]) if side == "LONG" else min(PATTERN[47][0], PATTERN[47][3])
+    label = {
+        "side": side,
+        "level": price * (1 + sign * SWING_LOW * unit),
+        "entry": price * (1 + sign * entry_units * unit),
+        "key_index": structure + 30,
+    }
+    return bars, label
+
+
+def _decimal(exponent: int) -> str:
+    return format(Decimal(1).scaleb(exponent), "f")
+
+
+class SyntheticMarket:
+    """
+    OHLCV history for thousands of made-up USDT perpetuals (SYN00000USDT, ...), some ending in a planted
+    setup whose ground truth is in `labels`.
+
+    Candles are served in the exchange's raw kline format (`klines`) or as `Trader.get_candles` dicts
+    (`get_candles`), for any interval the base interval divides. Unless `end_ms` pins the history, the market
+    keeps generating base candles as the wall clock moves on, so a bot can run against it indefinitely.
+    """
+
+    def __init__(self, symbols: int = config.SYNTHETIC_SYMBOLS, model: str = config.SYNTHETIC_MODEL,
+                 setup_rate: float = config.SYNTHETIC_SETUP_RATE, seed: int = config.SYNTHETIC_SEED,
+                 hours: int = 48, end_ms: int = None):
+        if config.LOWER_TIMEFRAME != config.BASE_TIMEFRAME:
+            raise ValueError("Planted setups assume LOWER_TIMEFRAME == BASE_TIMEFRAME")
+        self.base_interval = config.BASE_TIMEFRAME
+        self.base_ms = interval_ms(self.base_interval)
+        self.rng = np.random.default_rng(seed)
+        self.model = MODELS[model]()
+        self.symbols = [f"SYN{i:05d}USDT" for i in range(symbols)]
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._lock = threading.Lock()
+        self.live = end_ms is None
+
+        window = config.CANDLE_LIMIT * (interval_ms(config.TIMEFRAME) // self.base_ms)
+        n = max(hours * 3_600_000 // self.base_ms, window + 1)
+        end = bucket_start(end_ms if end_ms is not None else int(time.time() * 1000), self.base_interval)
+        self.times = end - self.base_ms * np.arange(n - 1, -1, -1, dtype=np.int64)
+        start_prices = np.exp(self.rng.uniform(math.log(0.05), math.log(500), symbols))
+        returns, vols = self.model.returns(self.rng, symbols, n)
+        self.bars = bars_from_returns(self.rng, start_prices, returns, vols)
+
+        self.labels = {}  # symbol -> planted setup
+        for row in np.flatnonzero(self.rng.random(symbols) < setup_rate):
+            side = "LONG" if self.rng.random() < 0.5 else "SHORT"
+            bars, label = plant_setup(self.rng, self.bars[row, -window - 1, 3], side, window)
+            self.bars[row, -window:] = bars
+            label["key_time"] = int(self.times[-window + label.pop("key_index")])
+            self.labels[self.symbols[row]] = label
+
+        # Tick and step sizes in line with each symbol's starting price
+        self._exponents = {symbol: (math.floor(math.log10(price)) - 4, min(0, math.floor(math.log10(10 / price))))
+                           for symbol, price in zip(self.symbols, start_prices)}
+        logger.info(f"Synthetic market: {symbols} symbols x {n} {self.base_interval} candles ({model}), "
+                    f"{len(self.labels)} planted setups")
+
+    # Time
+    def _advance(self):
+        """
+        Append base candles up to the current one for every symbol.
+        """
+        if not self.live:
+            return
+        current = bucket_start(int(time.time() * 1000), self.base_interval)
+        if current <= self.times[-1]:
+            return
+        with self._lock:
+            count = min((current - int(self.times[-1])) // self.base_ms, len(self.times))
+            if count <= 0:
+                return
+            returns, vols = self.model.returns(self.rng, len(self.symbols), count)
+            new = bars_from_returns(self.rng, self.bars[:, -1, 3], returns, vols)
+            self.bars = np.concatenate([self.bars[:, count:], new], axis=1)
+            self.times = np.concatenate([self.times[count:], current - self.base_ms * np.arange(count - 1, -1, -1)])
+
+    # Market data
+    def _series(self, symbol: str, interval: str) -> tuple:
+        self._advance()
+        times, bars = self.times, self.bars[self._rows[symbol]]
+        if interval == self.base_interval:
+            return times, bars
+        ms = interval_ms(interval)
+        if ms % self.base_ms:
+            raise ValueError(f"{interval} is not a multiple of the synthetic base interval {self.base_interval}")
+        first = bucket_start(int(times[0]), interval)
+        if first != times[0]:
+            first += ms  # drop a partial first candle
+        keep = times >= first
+        times, bars = times[keep], bars[keep]
+        starts = np.flatnonzero(np.r_[True, np.diff((times - first) // ms) != 0])
+        merged = np.empty((len(starts), 5))
+        merged[:, 0] = bars[starts, 0]
+        merged[:, 1] = np.maximum.reduceat(bars[:, 1], starts)
+        merged[:, 2] = np.minimum.reduceat(bars[:, 2], starts)
+        merged[:, 3] = bars[np.r_[starts[1:] - 1, len(bars) - 1], 3]
+        merged[:, 4] = np.add.reduceat(bars[:, 4], starts)
+        return times[starts], merged
+
+    def _window(self, symbol: str, interval: str, limit: int, start_time=None) -> tuple:
+        times, bars = self._series(symbol, interval)
+        if start_time is not None:
+            first = int(np.searchsorted(times, start_time))
+            return times[first:first + limit], bars[first:first + limit]
+        return times[-limit:], bars[-limit:]
+
+    def get_candles(self, symbol, interval, limit=100, start_time=None) -> list:
+        """
+        Same signature and candle dicts as `Trader.get_candles`.
+        """
+        times, bars = self._window(symbol, interval, limit, start_time)
+        return [
+            {"timestamp": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, (o, h, l, c, v) in zip(times.tolist(), bars.tolist())
+        ]
+
+    def klines(self, symbol, interval, limit=500, start_time=None) -> list:
+        ms = interval_ms(interval)
+        times, bars = self._window(symbol, interval, limit, start_time)
+        return [
+            [t, repr(o), repr(h), repr(l), repr(c), repr(v), t + ms - 1, repr(v * c), 0, "0", "0", "0"]
+            for t, (o, h, l, c, v) in zip(times.tolist(), bars.tolist())
+        ]
+
+    def last_price(self, symbol: str) -> float:
+        self._advance()
+        return float(self.bars[self._rows[symbol], -1, 3])
+
+    def exchange_info(self) -> dict:
+        symbols = []
+        for symbol in self.symbols:
+            tick, step = self._exponents[symbol]
+            symbols.append({
+                "symbol": symbol,
+                "status": "TRADING",
+                "contractType": "PERPETUAL",
+                "pricePrecision": max(0, -tick),
+                "quantityPrecision": max(0, -step),
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": _decimal(tick)},
+                    {"filterType": "LOT_SIZE", "stepSize": _decimal(step), "minQty": _decimal(step)},
+                ],
+            })
+        return {"symbols": symbols}
+
+
+class SyntheticError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+
+
+class SyntheticClient:
+    """
+    Stand-in for the binance Client over a SyntheticMarket, with the futures calls the bot makes.
+
+    Orders are kept in memory. A limit order fills once a later candle trades through its price, and
+    market orders fill at the last close. Positions are the net filled quantity per symbol; commissions
+    aren't modelled.
+    """
+
+    def __init__(self, market: SyntheticMarket):
+        self.market = market
+        self.orders = {}
+        self.leverage = {}
+        self.timestamp_offset = 0
+        self.REQUEST_RECVWINDOW = config.RECV_WINDOW_MIN
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def futures_ping(self, **params):
+        return {}
+
+    def futures_time(self, **params):
+        return {"serverTime": int(time.time() * 1000)}
+
+    def futures_exchange_info(self, **params):
+        return self.market.exchange_info()
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, **params):
+        return self.market.klines(symbol, interval, int(limit), int(startTime) if startTime is not None else None)
+
+    def futures_symbol_ticker(self, symbol, **params):
+        return {"symbol": symbol, "price": repr(self.market.last_price(symbol)), "time": int(time.time() * 1000)}
+
+    def futures_change_leverage(self, symbol, leverage, **params):
+        self.leverage[symbol] = int(leverage)
+        return {"symbol": symbol, "leverage": int(leverage)}
+
+    def futures_symbol_config(self, **params):
+        return [{"symbol": symbol, "marginType": "CROSSED", "leverage": leverage}
+                for symbol, leverage in self.leverage.items()]
+
+    def futures_position_information(self, **params):
+        amounts = {}
+        for order in list(self.orders.values()):
+            self._settle(order)
+            if order["status"] == "FILLED":
+                qty = Decimal(order["executedQty"])
+                amounts[order["symbol"]] = amounts.get(order["symbol"], 0) + (qty if order["side"] == "BUY" else -qty)
+        return [{"symbol": symbol, "positionSide": "BOTH", "positionAmt": str(amount),
+                 "markPrice": repr(self.market.last_price(symbol))}
+                for symbol, amount in amounts.items() if amount]
+
+    def futures_create_order(self, symbol, side, type, quantity, price=None, **params):
+        if symbol not in self.market._rows:
+            raise SyntheticError(-1121, "Invalid symbol.")
+        now = int(time.time() * 1000)
+        with self._lock:
+            order_id = self._next_id
+            self._next_id += 1
+        order = {
+            "orderId": order_id, "symbol": symbol, "side": side, "type": type, "status": "NEW",
+            "price": str(price or 0), "origQty": str(quantity), "executedQty": "0", "avgPrice": "0",
+            "updateTime": now,
+        }
+        if type == "MARKET":
+            order.update(status="FILLED", executedQty=str(quantity), avgPrice=repr(self.market.last_price(symbol)))
+        self.orders[order_id] = order
+        return dict(order)
+
+    def futures_place_batch_order(self, batchOrders, **params):
+        if isinstance(batchOrders, str):
+            batchOrders = json.loads(batchOrders)
+        results = []
+        for order in batchOrders:
+            try:
+                results.append(self.futures_create_order(**order))
+            except SyntheticError as e:
+                results.append({"code": e.code, "msg": str(e)})
+        return results
+
+    def _order(self, order_id) -> dict:
+        order = self.orders.get(int(order_id))
+        if order is None:
+            raise SyntheticError(-2013, "Order does not exist.")
+        return order
+
+    def _settle(self, order: dict):
+        """
+        Fill a resting limit order once a candle at or after its placement traded through the limit price.
+        """
+        if order["status"] != "NEW" or order["type"] != "LIMIT":
+            return
+        times, bars = self.market._series(order["symbol"], self.market.base_interval)
+        since = bars[times >= bucket_start(order["updateTime"], self.market.base_interval)]
+        price = float(order["price"])
+        if len(since) and (since[:, 2].min() <= price if order["side"] == "BUY" else since[:, 1].max() >= price):
+            order.update(status="FILLED", executedQty=order["origQty"], avgPrice=order["price"],
+                         updateTime=int(time.time() * 1000))
+
+    def futures_get_order(self, symbol, orderId, **params):
+        order = self._order(orderId)
+        self._settle(order)
+        return dict(order)
+
+    def futures_cancel_order(self, symbol, orderId, **params):
+        order = self._order(orderId)
+        if order["status"] != "NEW":
+            raise SyntheticError(-2011, "Unknown order sent.")
+        order.update(status="CANCELED", updateTime=int(time.time() * 1000))
+        return dict(order)
+
+    def futures_get_open_orders(self, **params):
+        for order in list(self.orders.values()):
+            self._settle(order)
+        return [dict(o) for o in self.orders.values() if o["status"] == "NEW"]
+
+    def futures_account_trades(self, symbol=None, orderId=None, **params):
+        order = self.orders.get(int(orderId)) if orderId is not None else None
+        if not order or order["status"] != "FILLED":
+            return []
+        return [{"orderId": order["orderId"], "price": order["avgPrice"], "qty": order["executedQty"],
+                 "commission": "0", "commissionAsset": "USDT"}]
+
+
+_market = None
+
+
+def synthetic_client():
+    """
+    Client for EXCHANGE_MODE=synthetic: a binance Client pointed at SYNTHETIC_URL when it's set, otherwise a
+    SyntheticClient over a market shared by every client in the process.
+    """
+    global _market
+    if config.SYNTHETIC_URL:
+        from binance.client import Client
+        client = Client("synthetic", "synthetic", ping=False)
+        client.FUTURES_URL = config.SYNTHETIC_URL.rstrip("/") + "/fapi"
+        return client
+    if _market is None:
+        _market = SyntheticMarket()
+    return SyntheticClient(_market)
+
+
+# Local endpoint
+ROUTES = {
+    ("GET", "/fapi/v1/ping"): "futures_ping",
+    ("GET", "/fapi/v1/time"): "futures_time",
+    ("GET", "/fapi/v1/exchangeInfo"): "futures_exchange_info",
+    ("GET", "/fapi/v1/klines"): "futures_klines",
+    ("GET", "/fapi/v1/ticker/price"): "futures_symbol_ticker",
+    ("POST", "/fapi/v1/leverage"): "futures_change_leverage",
+    ("GET", "/fapi/v1/symbolConfig"): "futures_symbol_config",
+    ("GET", "/fapi/v3/positionRisk"): "futures_position_information",
+    ("GET", "/fapi/v2/positionRisk"): "futures_position_information",
+    ("POST", "/fapi/v1/order"): "futures_create_order",
+    ("POST", "/fapi/v1/batchOrders"): "futures_place_batch_order",
+    ("GET", "/fapi/v1/order"): "futures_get_order",
+    ("DELETE", "/fapi/v1/order"): "futures_cancel_order",
+    ("GET", "/fapi/v1/openOrders"): "futures_get_open_orders",
+    ("GET", "/fapi/v1/userTrades"): "futures_account_trades",
+}
+SIGNING_PARAMS = {"timestamp", "signature", "recvWindow"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    client = None
+
+    def _respond(self, status: int, body):
+        payload = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        route = ROUTES.get((method, url.path))
+        if route is None:
+            self._respond(404, {"code": -5000, "msg": f"Path {url.path} not served by the synthetic market"})
+            return
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+        params = {k: v for k, v in params.items() if k not in SIGNING_PARAMS}
+        try:
+            self._respond(200, getattr(self.client, route)(**params))
+        except SyntheticError as e:
+            self._respond(400, {"code": e.code, "msg": str(e)})
+        except (KeyError, TypeError, ValueError) as e:
+            self._respond(400, {"code": -1102, "msg": f"Bad parameters: {e}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(market: SyntheticMarket, address: str):
+    """
+    Serve `market` over HTTP with the exchange's futures paths, for bots started with
+    EXCHANGE_MODE=synthetic SYNTHETIC_URL=http://<address>.
+    """
+    host, port = address.rsplit(":", 1)
+    handler = type("Handler", (_Handler,), {"client": SyntheticClient(market)})
+    server = ThreadingHTTPServer((host, int(port)), handler)
+    logger.info(f"Synthetic market served on http://{host}:{port}")
+    server.serve_forever()
+
+
+# Benchmarks
+def timed_scan(market: SyntheticMarket, strategy, engine: DataEngine, prioritizer: ScanPrioritizer) -> tuple:
+    """
+    One pass over the whole universe through the bot's own scan loop.
+
+    Returns:
+        tuple: ({symbol: (side, entry_price)} of the entry signals, seconds taken)
+    """
+    signals = {}
+    started = time.perf_counter()
+    for chunk in scan(strategy, engine, prioritizer, market.symbols):
+        for _, symbol, side, entry_price, _, _ in chunk:
+            signals[symbol] = (side, entry_price)
+    return signals, time.perf_counter() - started
+
+
+def score(market: SyntheticMarket, signals: dict) -> dict:
+    """
+    Recall of the planted setups (right side and entry price) and signals on symbols with nothing planted.
+    """
+    found = [s for s, label in market.labels.items() if signals.get(s, (None,))[0] == label["side"]]
+    exact = [s for s in found if math.isclose(signals[s][1], market.labels[s]["entry"], rel_tol=1e-9)]
+    return {
+        "planted": len(market.labels),
+        "recall": len(found) / len(market.labels) if market.labels else None,
+        "entry_exact": len(exact),
+        "unplanted_signals": sum(1 for s in signals if s not in market.labels),
+    }
+
+
+def benchmark(sizes: list, model: str, setup_rate: float, seed: int):
+    from src.strategy_loader import load_strategy
+
+    print(f"{'symbols':>8}{'cold scan s':>13}{'sym/s':>9}{'warm scan s':>13}{'sym/s':>9}"
+          f"{'planted':>9}{'recall':>8}{'exact':>7}{'other':>7}")
+    for size in sizes:
+        market = SyntheticMarket(size, model, setup_rate, seed, end_ms=int(time.time() * 1000))
+        strategy = load_strategy(config.STRATEGY_NAME)
+        builder = CandleBuilder(market.get_candles, market.base_interval)
+        engine = DataEngine(builder, strategy.data_requirements(), market.get_candles)
+        strategy.candle_builder = builder
+        prioritizer = ScanPrioritizer()
+        signals, cold = timed_scan(market, strategy, engine, prioritizer)
+        _, warm = timed_scan(market, strategy, engine, prioritizer)  # candles cached; only the forming candle is re-read
+        result = score(market, signals)
+        recall = f"{result['recall']:.1%}" if result["recall"] is not None else "-"
+        print(f"{size:>8}{cold:>13.2f}{size / cold:>9.0f}{warm:>13.2f}{size / warm:>9.0f}"
+              f"{result['planted']:>9}{recall:>8}{result['entry_exact']:>7}{result['unplanted_signals']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic market with planted sweep setups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("bench", "serve"):
+        command = sub.add_parser(name)
+        command.add_argument("--model", choices=list(MODELS), default=config.SYNTHETIC_MODEL)
+        command.add_argument("--setup-rate", type=float, default=config.SYNTHETIC_SETUP_RATE)
+        command.add_argument("--seed", type=int, default=config.SYNTHETIC_SEED)
+    sub.choices["bench"].add_argument("--symbols", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    sub.choices["serve"].add_argument("--symbols", type=int, default=config.SYNTHETIC_SYMBOLS)
+    sub.choices["serve"].add_argument("--address", default="127.0.0.1:7500")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark(args.symbols, args.model, args.setup_rate, args.seed)
+    else:
+        serve(SyntheticMarket(args.symbols, args.model, args.setup_rate, args.seed), args.address)
+
+
+if __name__ == "__main__":
+    main()
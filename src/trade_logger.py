@@ -52,4 +52,24 @@ def log_trade(
                 exit_price,
                 datetime.fromtimestamp(entry_time, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
                 datetime.fromtimestamp(exit_time, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-            ])
\ No newline at end of file
+            ])
+
+EXECUTION_FIELDS = [
+    "order_id", "symbol", "side", "quantity", "notional",
+    "signal_time", "ack_time", "fill_time", "entry_time", "exit_trigger_time", "exit_fill_time",
+    "entry_price", "entry_fill_price", "exit_level", "exit_trigger_price", "exit_fill_price",
+    "fees", "entry_slippage_bps", "exit_polling_bps", "exit_slippage_bps", "fees_bps",
+]
+
+
+def log_execution(record: dict):
+    """
+    Append one trade's execution timings, fill prices and costs to EXECUTIONS_FILE.
+    """
+    file = config.EXECUTIONS_FILE
+    write_header = not os.path.exists(file) or os.stat(file).st_size == 0
+    with open(file, mode="a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EXECUTION_FIELDS, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        writer.writerow(record)
@@ -1,70 +1,119 @@
-from decimal import Decimal
-from binance.client import Client
+from src.precision import SymbolPrecision
 from src.logger import logger
 from src.config import config
+import time
+
+# Same values as binance.enums, kept here so importing the bot doesn't load the whole client package
+SIDE_BUY = "BUY"
+SIDE_SELL = "SELL"
+
+
+def create_client(api_key=None, api_secret=None):
+    if config.EXCHANGE_MODE == "replay":
+        from src.recorder import replay_client
+        return replay_client()
+    if config.EXCHANGE_MODE == "synthetic":
+        from src.synthetic import synthetic_client
+        return synthetic_client()
+    from binance.client import Client
+    client = Client(api_key or config.BINANCE_API_KEY, api_secret or config.BINANCE_API_SECRET, testnet=config.TESTNET)
+    if config.EXCHANGE_MODE == "record":
+        from src.recorder import recording_client
+        return recording_client(client)
+    return client
+
+
+def create_clock():
+    """
+    Clock for exchange-facing timing (request sizes, poll intervals, order timestamps) with `time()` and
+    `sleep()`: the time module, or the virtual clock a replay advances along the recorded responses.
+    """
+    if config.EXCHANGE_MODE == "replay":
+        from src.recorder import replay_clock
+        return replay_clock()
+    return time
+
 
 class Trader:
-    def __init__(self):
-        self.exchange = Client(config.BINANCE_API_KEY, config.BINANCE_API_SECRET, testnet=config.TESTNET)
-        logger.info("Binance Futures client initialized.")
-
-    def get_symbol_filters(self, symbol):
-        info = self.exchange.futures_exchange_info()
-        for s in info['symbols']:
-            if s['symbol'] == symbol:
-                filters = {f['filterType']: f for f in s['filters']}
-                price_precision = int(s['pricePrecision'])
-                quantity_precision = int(s['quantityPrecision'])
-                return {
-                    "price_precision": price_precision,
-                    "quantity_precision": quantity_precision,
-                    "min_qty": float(filters['LOT_SIZE']['minQty']),
-                    "step_size": float(filters['LOT_SIZE']['stepSize']),
-                    "tick_size": float(filters['PRICE_FILTER']['tickSize']),
-                }
-        return None
+    def __init__(self, api_key=None, api_secret=None, name="",
+                 trade_quantity_usdt=config.TRADE_QUANTITY_USDT, leverage=config.LEVERAGE):
+        """
+        Defaults to the main account from config; other accounts pass their own keys and sizing.
+        """
+        self.exchange = create_client(api_key, api_secret)
+        self.clock = create_clock()
+        self.name = name
+        self.trade_quantity_usdt = trade_quantity_usdt
+        self.leverage = leverage
+        self._exchange_info = None
+        self._exchange_info_time = 0
+        self._precision = {}
+        logger.info(f"Binance Futures client initialized{f' for account {name}' if name else ''}.")
+
+    def get_exchange_info(self):
+        """
+        Exchange metadata (symbols, filters), cached for EXCHANGE_INFO_MAX_AGE seconds.
+        """
+        if self._exchange_info is None or self.clock.time() - self._exchange_info_time > config.EXCHANGE_INFO_MAX_AGE:
+            self.load_exchange_info(self.exchange.futures_exchange_info())
+        return self._exchange_info
+
+    def load_exchange_info(self, info, fetched_at=None):
+        self._exchange_info = info
+        self._exchange_info_time = fetched_at if fetched_at is not None else self.clock.time()
+        self._precision = {}
 
-    def round_down(self, value, step):
+    def get_precision(self, symbol):
         """
-        Round down `value` to nearest multiple of `step` using Decimal for precision.
+        Integer tick/step converter for `symbol`, built once from its exchange filters.
         """
-        value_dec = Decimal(str(value))
-        step_dec = Decimal(str(step))
-        return float((value_dec // step_dec) * step_dec)
+        precision = self._precision.get(symbol)
+        if precision is None:
+            for s in self.get_exchange_info()['symbols']:
+                if s['symbol'] == symbol:
+                    precision = self._precision[symbol] = SymbolPrecision.from_symbol_info(s)
+                    break
+        return precision
 
     def calculate_order_quantity(self, symbol, entry_price):
-        filters = self.get_symbol_filters(symbol)
-        if not filters:
+        precision = self.get_precision(symbol)
+        if not precision:
             logger.error(f"Symbol filters not found for {symbol}, can't calculate quantity.")
             return 0
 
-        usdt_amount = config.TRADE_QUANTITY_USDT
-        raw_qty = (usdt_amount * config.LEVERAGE) / entry_price
-        quantity = self.round_down(raw_qty, filters['step_size'])
+        usdt_amount = self.trade_quantity_usdt
+        steps = precision.steps_for_notional(usdt_amount * self.leverage, precision.price_to_ticks(entry_price))
 
-        if quantity < filters['min_qty']:
-            logger.warning(f"Calculated quantity {quantity} is less than minimum {filters['min_qty']} for {symbol}")
+        if steps < precision.min_steps:
+            logger.warning(f"Calculated quantity {precision.format_qty(steps)} is less than minimum "
+                           f"{precision.format_qty(precision.min_steps)} for {symbol}")
             return 0
-        return quantity
+        return precision.steps_to_qty(steps)
+
+    def limit_order_params(self, symbol, side, quantity, price):
+        """
+        Parameters for a GTC limit order with price and quantity snapped down to the symbol's grid.
+        Values are exact decimal strings so no float repr noise reaches the exchange.
+        """
+        precision = self.get_precision(symbol)
+        if not precision:
+            logger.error(f"Symbol filters not found for {symbol}")
+            return None
+        return {
+            "symbol": symbol,
+            "side": side,
+            "type": "LIMIT",
+            "quantity": precision.format_qty(precision.qty_to_steps(quantity)),
+            "price": precision.format_price(precision.price_to_ticks(price)),
+            "timeInForce": "GTC",
+        }
 
     def place_limit_order(self, symbol, side, quantity, price):
         try:
-            filters = self.get_symbol_filters(symbol)
-            if not filters:
-                logger.error(f"Symbol filters not found for {symbol}")
+            params = self.limit_order_params(symbol, side, quantity, price)
+            if not params:
                 return None
-
-            price = self.round_down(price, filters["tick_size"])
-            quantity = self.round_down(quantity, filters["step_size"])
-
-            order = self.exchange.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type="LIMIT",
-                quantity=quantity,
-                price=price,
-                timeInForce="GTC"
-            )
+            order = self.exchange.futures_create_order(**params)
             logger.info(f"Limit order placed: {order}")
             return order
 
@@ -72,19 +121,38 @@ class Trader:
             logger.error(f"Failed to place limit order: {e}")
             return None
 
+    def place_batch_orders(self, orders):
+        """
+        Submit up to 5 orders in one batchOrders request.
+
+        Returns:
+            list: One entry per order, either the order response or an error dict with 'code' and 'msg'.
+            None if the request itself failed.
+        """
+        try:
+            return self.exchange.futures_place_batch_order(batchOrders=orders)
+        except Exception as e:
+            logger.error(f"Failed to place batch orders: {e}")
+            return None
+
     def set_leverage(self, symbol, leverage):
         try:
             self.exchange.futures_change_leverage(symbol=symbol, leverage=leverage)
+            return True
         except Exception as e:
             logger.error(f"Failed to set leverage for {symbol}: {e}")
+            return False
 
     def get_available_pairs(self):
-        info = self.exchange.futures_exchange_info()
+        info = self.get_exchange_info()
         return [s['symbol'] for s in info['symbols'] if s['contractType'] == 'PERPETUAL' and s['status'] == 'TRADING']
 
-    def get_candles(self, symbol, interval, limit=100):
+    def get_candles(self, symbol, interval, limit=100, start_time=None):
         try:
-            klines = self.exchange.futures_klines(symbol=symbol, interval=interval, limit=limit)
+            if start_time is None:
+                klines = self.exchange.futures_klines(symbol=symbol, interval=interval, limit=limit)
+            else:
+                klines = self.exchange.futures_klines(symbol=symbol, interval=interval, limit=limit, startTime=start_time)
             return [
                 {
                     "timestamp": k[0],
@@ -100,6 +168,37 @@ class Trader:
             logger.error(f"Failed to fetch candles for {symbol}: {e}")
             return []
 
+    def get_server_time(self):
+        """
+        Exchange time in milliseconds, or None on failure.
+        """
+        try:
+            return self.exchange.futures_time()["serverTime"]
+        except Exception as e:
+            logger.error(f"Failed to get server time: {e}")
+            return None
+
+    def ping(self):
+        try:
+            self.exchange.futures_ping()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to ping exchange: {e}")
+            return False
+
+    def exchange_time_ms(self):
+        """
+        Local time corrected by the clock offset the latency probe keeps, in milliseconds.
+        """
+        return int(self.clock.time() * 1000) + getattr(self.exchange, "timestamp_offset", 0)
+
+    def apply_clock(self, offset_ms, recv_window_ms):
+        """
+        Shift the timestamp of every signed request by `offset_ms` and set the recvWindow they carry.
+        """
+        self.exchange.timestamp_offset = offset_ms
+        self.exchange.REQUEST_RECVWINDOW = recv_window_ms
+
     def get_ticker(self, symbol):
         """
         Fetches the latest price of a trade pair. Better than fetching candles since candles tend to have older data
@@ -110,13 +209,29 @@ class Trader:
             logger.error(f"Failed to get last traded price for {symbol}: {e}")
             return []
 
-    def check_order_filled(self, symbol, order_id):
+    def get_order(self, symbol, order_id):
+        """
+        Order status, average fill price (avgPrice) and last update time (updateTime, ms). None on failure.
+        """
         try:
-            order = self.exchange.futures_get_order(symbol=symbol, orderId=order_id)
-            return order['status'] == 'FILLED'
+            return self.exchange.futures_get_order(symbol=symbol, orderId=order_id)
         except Exception as e:
             logger.error(f"Failed to check order status: {e}")
-            return False
+            return None
+
+    def check_order_filled(self, symbol, order_id):
+        order = self.get_order(symbol, order_id)
+        return bool(order) and order['status'] == 'FILLED'
+
+    def get_order_fills(self, symbol, order_id):
+        """
+        Account trades that filled an order, each with its price, qty, commission and commissionAsset.
+        """
+        try:
+            return self.exchange.futures_account_trades(symbol=symbol, orderId=order_id)
+        except Exception as e:
+            logger.error(f"Failed to fetch fills for order {order_id}: {e}")
+            return []
 
     def cancel_order(self, symbol, order_id):
         try:
@@ -124,14 +239,53 @@ class Trader:
         except Exception as e:
             logger.error(f"Failed to cancel order: {e}")
 
+    def get_open_orders(self):
+        """
+        Open orders across all symbols in one request. Returns None on failure.
+        """
+        try:
+            return self.exchange.futures_get_open_orders()
+        except Exception as e:
+            logger.error(f"Failed to fetch open orders: {e}")
+            return None
+
+    def get_positions(self):
+        """
+        Position information for every symbol in one request. Returns None on failure.
+        """
+        try:
+            return self.exchange.futures_position_information()
+        except Exception as e:
+            logger.error(f"Failed to fetch positions: {e}")
+            return None
+
+    def get_symbol_config(self):
+        """
+        Leverage and margin type for every symbol in one request. Returns None on failure.
+        """
+        try:
+            return self.exchange.futures_symbol_config()
+        except Exception as e:
+            logger.error(f"Failed to fetch symbol config: {e}")
+            return None
+
     def close_position(self, symbol, quantity, side):
+        """
+        Market order against the position, reduce-only so it can never open a reverse position.
+        """
         opposite_side = "SELL" if side == "BUY" else "BUY"
+        precision = self.get_precision(symbol)
+        if not precision:
+            logger.error(f"Symbol filters not found for {symbol}, can't close position.")
+            return None
         try:
             order = self.exchange.futures_create_order(
                 symbol=symbol,
                 side=opposite_side,
                 type="MARKET",
-                quantity=quantity,
+                quantity=precision.format_qty(precision.qty_to_steps(quantity)),
+                reduceOnly="true",
+                newOrderRespType="RESULT",  # respond once filled, with avgPrice
             )
             logger.info(f"Position closed on {symbol} with {opposite_side} MARKET order.")
             return order